@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (
     BooleanField,
     IntegerField,
@@ -8,7 +9,40 @@ from wtforms import (
     SubmitField,
     TextAreaField,
 )
-from wtforms.validators import DataRequired, Email, EqualTo, Length, NumberRange
+from wtforms.validators import (
+    DataRequired,
+    Email,
+    EqualTo,
+    Length,
+    NumberRange,
+    ValidationError,
+)
+
+from allergens import ALLERGENS, unknown_numbers
+from prices import parse_price
+
+
+def has_price(form, field):
+    if parse_price(field.data) is None:
+        raise ValidationError("Skriv inn en pris, f.eks. 195 eller 385 kr/pers")
+
+
+MENU_CATEGORIES = [
+    ("hovedretter", "Hovedretter"),
+    ("ekstra", "Ekstra"),
+    ("dessert", "Dessert"),
+    ("drikker", "Drikker"),
+    ("alkohol", "Alkoholholdige drikker"),
+    ("catering", "Catering"),
+]
+
+# Sections within a category, in the order the menu page shows them
+MENU_SUBCATEGORIES = [
+    ("ol", "Øl"),
+    ("vin", "Vin"),
+    ("cocktails", "Cocktails & Drinker"),
+    ("brennevin", "Brennevin"),
+]
 
 
 class LoginForm(FlaskForm):
@@ -33,17 +67,14 @@ class CreateAdminForm(FlaskForm):
 class MenuItemForm(FlaskForm):
     name = StringField("Navn på rett", validators=[DataRequired(), Length(max=100)])
     description = TextAreaField("Beskrivelse", validators=[Length(max=500)])
-    price = StringField("Pris (NOK)", validators=[DataRequired()])
+    price = StringField(
+        "Pris (NOK)", validators=[DataRequired(), Length(max=10), has_price]
+    )
     category = SelectField(
-        "Kategori",
-        choices=[
-            ("hovedretter", "Hovedretter"),
-            ("ekstra", "Ekstra"),
-            ("drikker", "Drikker"),
-            ("alkohol", "Alkoholholdige drikker"),
-            ("catering", "Catering"),
-        ],
-        validators=[DataRequired()],
+        "Kategori", choices=MENU_CATEGORIES, validators=[DataRequired()]
+    )
+    subcategory = SelectField(
+        "Underkategori", choices=[("", "Ingen")] + MENU_SUBCATEGORIES, default=""
     )
     image_filename = StringField("Bildenavn", validators=[Length(max=100)])
     sort_order = IntegerField(
@@ -55,7 +86,9 @@ class MenuItemForm(FlaskForm):
 
 class CateringPackageForm(FlaskForm):
     name = StringField("Pakkenavn", validators=[DataRequired(), Length(max=100)])
-    price_per_person = StringField("Pris per person (NOK)", validators=[DataRequired()])
+    price_per_person = StringField(
+        "Pris per person (NOK)", validators=[DataRequired(), Length(max=20), has_price]
+    )
     description = TextAreaField("Kort beskrivelse", validators=[Length(max=500)])
     items = TextAreaField(
         "Inkluderte retter (en per linje)", validators=[DataRequired()]
@@ -69,6 +102,14 @@ class CateringPackageForm(FlaskForm):
     is_active = BooleanField("Aktiv", default=True)
     submit = SubmitField("Lagre")
 
+    def validate_allergens(self, field):
+        unknown = unknown_numbers(field.data)
+        if unknown:
+            raise ValidationError(
+                f"Ukjent allergen: {', '.join(map(str, unknown))}"
+                f" (bruk 1-{len(ALLERGENS)})"
+            )
+
 
 class RestaurantInfoForm(FlaskForm):
     phone = StringField("Telefonnummer", validators=[DataRequired(), Length(max=20)])
@@ -78,3 +119,17 @@ class RestaurantInfoForm(FlaskForm):
         "Åpningstider", validators=[DataRequired(), Length(max=500)]
     )
     submit = SubmitField("Lagre endringer")
+
+
+class CatalogImportForm(FlaskForm):
+    kind = SelectField(
+        "Hva importeres",
+        choices=[("menu", "Menyretter"), ("catering", "Cateringpakker")],
+        validators=[DataRequired()],
+    )
+    file = FileField(
+        "Fil (CSV eller JSON)",
+        validators=[FileRequired(), FileAllowed(["csv", "json"], "Kun CSV eller JSON")],
+    )
+    dry_run = BooleanField("Bare vis endringer (prøvekjøring)", default=True)
+    submit = SubmitField("Importer")
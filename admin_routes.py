@@ -1,9 +1,26 @@
+import math
+import os
+from datetime import date
 from functools import wraps
 
-from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
 from flask_login import current_user, login_required, login_user, logout_user
+from sqlalchemy import func, select
 
 from admin_forms import (
+    MENU_CATEGORIES,
+    CatalogImportForm,
     CateringPackageForm,
     CreateAdminForm,
     LoginForm,
@@ -11,10 +28,27 @@ from admin_forms import (
     RestaurantInfoForm,
 )
 from app import db
-from models import CateringPackage, MenuItem, RestaurantInfo, User
+from catalog import (
+    FORMATS,
+    KINDS,
+    CatalogImportError,
+    import_rows,
+    read_rows,
+    summarize,
+)
+from catering import WITH_CONTENTS_IN, items_text, packages_contain, set_package_items
+from content import CATERING, MENU, bump_version
+from login_guard import HashingBusy, forgive_login, throttle_login, verify_password
+from models import CateringPackage, MenuItem, User
+from settings import get_settings, save_settings
+from utils import database, instrumentation
+from utils.pagination import keyset_paginate
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
+PER_PAGE = 50
+STATUS_FILTERS = {"active": True, "inactive": False}
+
 
 def admin_required(f):
     """Decorator to require admin access"""
@@ -30,6 +64,11 @@ def admin_required(f):
     return decorated_function
 
 
+def _active_filters(**filters):
+    """Filters that are set, for building list and pager URLs"""
+    return {name: value for name, value in filters.items() if value}
+
+
 @admin_bp.route("/login", methods=["GET", "POST"])
 def login():
     if current_user.is_authenticated and getattr(current_user, "is_admin", False):
@@ -37,12 +76,21 @@ def login():
 
     form = LoginForm()
     if form.validate_on_submit():
+        wait = throttle_login(request.remote_addr, form.username.data)
+        if wait:
+            return _login_unavailable(
+                form, 429, wait, "For mange innloggingsforsøk. Prøv igjen senere."
+            )
+
         user = User.query.filter_by(username=form.username.data).first()
-        if (
-            user
-            and user.check_password(form.password.data)
-            and getattr(user, "is_admin", False)
-        ):
+        try:
+            valid = user is not None and verify_password(user, form.password.data)
+        except HashingBusy:
+            return _login_unavailable(
+                form, 503, 5, "Innloggingen er opptatt. Prøv igjen om litt."
+            )
+        if valid and getattr(user, "is_admin", False):
+            forgive_login(form.username.data)
             login_user(user, remember=form.remember_me.data)
             flash("Velkommen til admin-panelet!", "success")
             return redirect(url_for("admin.dashboard"))
@@ -51,6 +99,16 @@ def login():
     return render_template("admin/login.html", form=form)
 
 
+def _login_unavailable(form, status, retry_after, message):
+    """The login page with an error status and a Retry-After header"""
+    flash(message, "error")
+    response = current_app.make_response(
+        (render_template("admin/login.html", form=form), status)
+    )
+    response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response
+
+
 @admin_bp.route("/setup-admin", methods=["GET", "POST"])
 def setup_admin():
     # Check if admin already exists
@@ -80,7 +138,7 @@ def setup_admin():
 def logout():
     logout_user()
     flash("Du er nå logget ut", "info")
-    return redirect(url_for("index"))
+    return redirect(url_for("public.index"))
 
 
 @admin_bp.route("/")
@@ -99,10 +157,53 @@ def dashboard():
 @login_required
 @admin_required
 def menu_list():
-    items = MenuItem.query.order_by(
-        MenuItem.category, MenuItem.sort_order, MenuItem.name
+    category = request.args.get("category", "")
+    status = request.args.get("status", "")
+    search = request.args.get("q", "").strip()
+
+    conditions = []
+    if search:
+        conditions.append(MenuItem.name.icontains(search, autoescape=True))
+
+    # One grouped count gives the numbers for every filter option
+    counts = db.session.execute(
+        select(MenuItem.category, MenuItem.is_active, func.count())
+        .where(*conditions)
+        .group_by(MenuItem.category, MenuItem.is_active)
     ).all()
-    return render_template("admin/menu_list.html", items=items)
+    category_counts = {}
+    status_counts = {"active": 0, "inactive": 0}
+    for row_category, is_active, count in counts:
+        if status not in STATUS_FILTERS or STATUS_FILTERS[status] == bool(is_active):
+            category_counts[row_category] = category_counts.get(row_category, 0) + count
+        if not category or category == row_category:
+            status_counts["active" if is_active else "inactive"] += count
+
+    if category:
+        total = category_counts.get(category, 0)
+        conditions.append(MenuItem.category == category)
+    else:
+        total = sum(category_counts.values())
+    if status in STATUS_FILTERS:
+        conditions.append(MenuItem.is_active == STATUS_FILTERS[status])
+
+    page = keyset_paginate(
+        db.session,
+        select(MenuItem).where(*conditions),
+        [MenuItem.category, MenuItem.sort_order, MenuItem.name, MenuItem.id],
+        PER_PAGE,
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+    return render_template(
+        "admin/menu_list.html",
+        page=page,
+        categories=MENU_CATEGORIES,
+        category_counts=category_counts,
+        status_counts=status_counts,
+        total=total,
+        filters=_active_filters(category=category, status=status, q=search),
+    )
 
 
 @admin_bp.route("/menu/add", methods=["GET", "POST"])
@@ -113,15 +214,17 @@ def add_menu_item():
     if form.validate_on_submit():
         item = MenuItem()
         item.name = form.name.data
-        item.description = form.description.data
-        item.price = form.price.data
+        item.set_description(form.description.data)
+        item.set_price(form.price.data)
         item.category = form.category.data
+        item.subcategory = form.subcategory.data or None
         item.image_filename = (
             form.image_filename.data if form.image_filename.data else None
         )
         item.is_active = form.is_active.data
         item.sort_order = form.sort_order.data
         db.session.add(item)
+        bump_version(MENU)
         db.session.commit()
         flash(f'Rett "{item.name}" er lagt til!', "success")
         return redirect(url_for("admin.menu_list"))
@@ -138,14 +241,18 @@ def edit_menu_item(id):
 
     if form.validate_on_submit():
         item.name = form.name.data
-        item.description = form.description.data
-        item.price = form.price.data
+        item.set_description(form.description.data)
+        item.set_price(form.price.data)
         item.category = form.category.data
+        item.subcategory = form.subcategory.data or None
         item.image_filename = (
             form.image_filename.data if form.image_filename.data else None
         )
         item.is_active = form.is_active.data
         item.sort_order = form.sort_order.data
+        bump_version(MENU)
+        if packages_contain([item.id]):
+            bump_version(CATERING)
         db.session.commit()
         flash(f'Rett "{item.name}" er oppdatert!', "success")
         return redirect(url_for("admin.menu_list"))
@@ -161,6 +268,7 @@ def edit_menu_item(id):
 def toggle_menu_item(id):
     item = MenuItem.query.get_or_404(id)
     item.is_active = not item.is_active
+    bump_version(MENU)
     db.session.commit()
     status = "aktivert" if item.is_active else "deaktivert"
     flash(f'Rett "{item.name}" er {status}!', "success")
@@ -173,7 +281,10 @@ def toggle_menu_item(id):
 def delete_menu_item(id):
     item = MenuItem.query.get_or_404(id)
     name = item.name
+    if packages_contain([item.id]):
+        bump_version(CATERING)
     db.session.delete(item)
+    bump_version(MENU)
     db.session.commit()
     flash(f'Rett "{name}" er slettet!', "success")
     return redirect(url_for("admin.menu_list"))
@@ -183,10 +294,42 @@ def delete_menu_item(id):
 @login_required
 @admin_required
 def catering_list():
-    packages = CateringPackage.query.order_by(
-        CateringPackage.sort_order, CateringPackage.name
-    ).all()
-    return render_template("admin/catering_list.html", packages=packages)
+    status = request.args.get("status", "")
+    search = request.args.get("q", "").strip()
+
+    conditions = []
+    if search:
+        conditions.append(CateringPackage.name.icontains(search, autoescape=True))
+
+    counts = dict(
+        db.session.execute(
+            select(CateringPackage.is_active, func.count())
+            .where(*conditions)
+            .group_by(CateringPackage.is_active)
+        ).all()
+    )
+    status_counts = {
+        "active": counts.get(True, 0),
+        "inactive": sum(n for is_active, n in counts.items() if not is_active),
+    }
+
+    if status in STATUS_FILTERS:
+        conditions.append(CateringPackage.is_active == STATUS_FILTERS[status])
+
+    page = keyset_paginate(
+        db.session,
+        select(CateringPackage).where(*conditions).options(WITH_CONTENTS_IN),
+        [CateringPackage.sort_order, CateringPackage.name, CateringPackage.id],
+        PER_PAGE,
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+    return render_template(
+        "admin/catering_list.html",
+        page=page,
+        status_counts=status_counts,
+        filters=_active_filters(status=status, q=search),
+    )
 
 
 @admin_bp.route("/catering/add", methods=["GET", "POST"])
@@ -197,15 +340,16 @@ def add_catering_package():
     if form.validate_on_submit():
         package = CateringPackage()
         package.name = form.name.data
-        package.price_per_person = form.price_per_person.data
+        package.set_price_per_person(form.price_per_person.data)
         package.description = form.description.data
-        package.items = form.items.data
+        set_package_items(package, form.items.data)
         package.min_persons = form.min_persons.data
-        package.allergens = form.allergens.data
+        package.set_allergens(form.allergens.data)
         package.best_for = form.best_for.data
         package.sort_order = form.sort_order.data
         package.is_active = form.is_active.data
         db.session.add(package)
+        bump_version(CATERING)
         db.session.commit()
         flash(f'Catering-pakke "{package.name}" er lagt til!', "success")
         return redirect(url_for("admin.catering_list"))
@@ -221,17 +365,21 @@ def add_catering_package():
 def edit_catering_package(id):
     package = CateringPackage.query.get_or_404(id)
     form = CateringPackageForm(obj=package)
+    if request.method == "GET":
+        # Linked dishes under their current names
+        form.items.data = items_text(package)
 
     if form.validate_on_submit():
         package.name = form.name.data
-        package.price_per_person = form.price_per_person.data
+        package.set_price_per_person(form.price_per_person.data)
         package.description = form.description.data
-        package.items = form.items.data
+        set_package_items(package, form.items.data)
         package.min_persons = form.min_persons.data
-        package.allergens = form.allergens.data
+        package.set_allergens(form.allergens.data)
         package.best_for = form.best_for.data
         package.sort_order = form.sort_order.data
         package.is_active = form.is_active.data
+        bump_version(CATERING)
         db.session.commit()
         flash(f'Catering-pakke "{package.name}" er oppdatert!', "success")
         return redirect(url_for("admin.catering_list"))
@@ -247,6 +395,7 @@ def edit_catering_package(id):
 def toggle_catering_package(id):
     package = CateringPackage.query.get_or_404(id)
     package.is_active = not package.is_active
+    bump_version(CATERING)
     db.session.commit()
     status = "aktivert" if package.is_active else "deaktivert"
     flash(f'Catering-pakke "{package.name}" er {status}!', "success")
@@ -260,6 +409,7 @@ def delete_catering_package(id):
     package = CateringPackage.query.get_or_404(id)
     name = package.name
     db.session.delete(package)
+    bump_version(CATERING)
     db.session.commit()
     flash(f'Catering-pakke "{name}" er slettet!', "success")
     return redirect(url_for("admin.catering_list"))
@@ -269,46 +419,91 @@ def delete_catering_package(id):
 @login_required
 @admin_required
 def restaurant_info():
-    # Get current restaurant info
-    phone = RestaurantInfo.query.filter_by(key="phone").first()
-    email = RestaurantInfo.query.filter_by(key="email").first()
-    address = RestaurantInfo.query.filter_by(key="address").first()
-    hours = RestaurantInfo.query.filter_by(key="opening_hours").first()
-
     form = RestaurantInfoForm()
 
     if request.method == "GET":
         # Pre-populate form with current values
-        form.phone.data = phone.value if phone else "+47 61 17 77 71"
-        form.email.data = email.value if email else "post@nawaratthaimat.no"
-        form.address.data = (
-            address.value if address else "Tordenskjolds gate 1\n2821 Gjøvik\nNorge"
-        )
-        form.opening_hours.data = (
-            hours.value
-            if hours
-            else "Tir - Ons: 11:00 - 18:00\nTor - Fre: 11:00 - 20:00\nLørdag: 10:00 - 20:00\nSøndag: 12:00 - 20:00\nMandag: Stengt"
-        )
+        settings = get_settings()
+        form.phone.data = settings["phone"]
+        form.email.data = settings["email"]
+        form.address.data = settings["address"]
+        form.opening_hours.data = settings["opening_hours"]
 
     if form.validate_on_submit():
-        # Update or create restaurant info
-        for key, value in [
-            ("phone", form.phone.data),
-            ("email", form.email.data),
-            ("address", form.address.data),
-            ("opening_hours", form.opening_hours.data),
-        ]:
-            info = RestaurantInfo.query.filter_by(key=key).first()
-            if info:
-                info.value = value
-            else:
-                info = RestaurantInfo()
-                info.key = key
-                info.value = value
-                db.session.add(info)
-
-        db.session.commit()
+        save_settings(
+            {
+                "phone": form.phone.data,
+                "email": form.email.data,
+                "address": form.address.data,
+                "opening_hours": form.opening_hours.data,
+            }
+        )
         flash("Restaurantinformasjon er oppdatert!", "success")
         return redirect(url_for("admin.restaurant_info"))
 
     return render_template("admin/restaurant_info.html", form=form)
+
+
+@admin_bp.route("/import", methods=["GET", "POST"])
+@login_required
+@admin_required
+def import_catalog():
+    form = CatalogImportForm()
+    plan = None
+    if form.validate_on_submit():
+        upload = form.file.data
+        format = os.path.splitext(upload.filename)[1].lstrip(".").lower()
+        try:
+            rows = read_rows(upload.read().decode("utf-8"), format)
+            plan = import_rows(form.kind.data, rows, dry_run=form.dry_run.data)
+        except UnicodeDecodeError:
+            flash("Filen må være lagret som UTF-8", "error")
+        except CatalogImportError as exc:
+            for error in exc.errors[:20]:
+                flash(error, "error")
+            if len(exc.errors) > 20:
+                flash(f"... og {len(exc.errors) - 20} feil til", "error")
+        else:
+            if not form.dry_run.data:
+                counts = summarize(plan)
+                flash(
+                    f"Import fullført: {counts['create']} nye, "
+                    f"{counts['update']} oppdatert, {counts['unchanged']} uendret",
+                    "success",
+                )
+
+    return render_template(
+        "admin/import.html",
+        form=form,
+        plan=plan,
+        counts=summarize(plan) if plan is not None else None,
+    )
+
+
+@admin_bp.route("/export/<kind>.<format>")
+@login_required
+@admin_required
+def export_catalog(kind, format):
+    if kind not in KINDS or format not in FORMATS:
+        abort(404)
+    mimetype, stream = FORMATS[format]
+    filename = f"{kind}-{date.today().isoformat()}.{format}"
+    return Response(
+        stream_with_context(stream(kind)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@admin_bp.route("/slow-requests")
+@login_required
+@admin_required
+def slow_requests():
+    return render_template(
+        "admin/slow_requests.html",
+        enabled=instrumentation.is_enabled(current_app),
+        threshold_ms=current_app.config["SLOW_REQUEST_MS"],
+        requests=instrumentation.slow_requests(),
+        fragment_cache=current_app.extensions["fragment_cache"].stats(),
+        pools=database.pool_stats(db),
+    )
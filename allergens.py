@@ -0,0 +1,74 @@
+"""The 14 allergens of the Norwegian labelling rules, as an integer bitmask.
+
+Allergen number n is bit ``n - 1``, so a set of allergens fits in one
+integer column. "Contains any of" and "safe for" checks are then a single
+AND, in Python and in SQL alike::
+
+    mask & exclude == 0            # dish is safe for that guest
+    free_of(MenuItem.allergen_mask, exclude)   # same as a WHERE clause
+"""
+
+import re
+
+# number -> (short name, what it covers); the order is the official numbering
+ALLERGENS = {
+    1: ("Gluten", "Glutenholdig korn (hvete, rug, bygg, havre)"),
+    2: ("Skalldyr", "Reker, kreps, hummer, krabbe, blåskjell osv."),
+    3: ("Egg", "Egg"),
+    4: ("Fisk", "Fisk"),
+    5: ("Peanøtter", "Peanøtter"),
+    6: ("Soya", "Soya (soyaolje er ikke et allergen)"),
+    7: ("Melk", "Melk (og laktose)"),
+    8: ("Nøtter", "Mandel, hasselnøtt, valnøtt, cashewnøtt, pekannøtt osv."),
+    9: ("Selleri", "Selleri"),
+    10: ("Sennep", "Sennep"),
+    11: ("Sesamfrø", "Sesamfrø"),
+    12: ("Svoveldioksid og sulfitter", "Svoveldioksid og sulfitter"),
+    13: ("Lupin", "Lupin"),
+    14: ("Bløtdyr", "Blekksprut, muslinger, snegler osv."),
+}
+
+ALL_ALLERGENS = (1 << len(ALLERGENS)) - 1
+NUMBER = re.compile(r"\d+")
+
+
+def bit(number):
+    return 1 << (number - 1)
+
+
+def mask_of(numbers):
+    """Bitmask for allergen numbers; numbers outside the table are ignored"""
+    mask = 0
+    for number in numbers:
+        if number in ALLERGENS:
+            mask |= bit(number)
+    return mask
+
+
+def parse_mask(text):
+    """'1, 3,7' -> bitmask"""
+    return mask_of(int(number) for number in NUMBER.findall(text or ""))
+
+
+def numbers_in(mask):
+    """Allergen numbers set in a bitmask, in order"""
+    return [number for number in ALLERGENS if mask & bit(number)]
+
+
+def format_mask(mask):
+    """Bitmask -> '1,3,7', the way allergens are printed on the menu"""
+    return ",".join(str(number) for number in numbers_in(mask or 0))
+
+
+def unknown_numbers(text):
+    """Numbers in text that are not allergens, for form validation"""
+    return [
+        number
+        for number in (int(n) for n in NUMBER.findall(text or ""))
+        if number not in ALLERGENS
+    ]
+
+
+def free_of(column, mask):
+    """SQL condition: none of the allergens in mask are set in column"""
+    return column.bitwise_and(mask) == 0
@@ -7,52 +7,163 @@ from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+from utils import assets, database, fragment_cache, instrumentation
 
 
 class Base(DeclarativeBase):
     pass
 
 
-# Initialize Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET")
-app.wsgi_app = ProxyFix(
-    app.wsgi_app, x_proto=1, x_host=1
-)  # needed for url_for to generate with https
-
-# Database configuration
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_pre_ping": True,
-    "pool_recycle": 300,
-}
-
-# Initialize extensions
-db = SQLAlchemy(app, model_class=Base)
-login_manager = LoginManager(app)
+db = SQLAlchemy(model_class=Base, session_options={"class_": database.RoutingSession})
+login_manager = LoginManager()
 login_manager.login_view = "admin.login"
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    from models import User
-
-    return User.query.get(int(user_id))
-
-
-# Create tables
-with app.app_context():
-    import models  # noqa: F401
-
-    db.create_all()
-    logging.info("Database tables created")
-
-# Import routes to register them
-import routes  # noqa: F401
-
-# Import and register admin blueprint
-from admin_routes import admin_bp
-app.register_blueprint(admin_bp)
+    from identity import load_identity
+
+    return load_identity(int(user_id))
+
+
+def create_app(config=None):
+    """Build the Flask app.
+
+    Nothing here touches the database: the schema is managed with
+    ``flask db upgrade`` (see commands.py), not on every worker boot.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET")
+    # needed for url_for to generate with https, and for the client IP that
+    # login throttling uses
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
+
+    # Changes on every deploy; part of the page validators in routes.py
+    app.config["DEPLOY_VERSION"] = os.environ.get("DEPLOY_VERSION")
+    app.config["PAGE_CACHE_MAX_AGE"] = int(os.environ.get("PAGE_CACHE_MAX_AGE", "0"))
+    # Lifetime for static files requested without a content hash in the name
+    app.config["STATIC_MAX_AGE"] = int(os.environ.get("STATIC_MAX_AGE", "300"))
+    # Pre-rendered public pages are kept up to date here when set (see export.py)
+    app.config["STATIC_EXPORT_DIR"] = os.environ.get("STATIC_EXPORT_DIR")
+
+    # Outgoing mail for catering inquiries (see mailer.py)
+    app.config["SENDGRID_API_KEY"] = os.environ.get("SENDGRID_API_KEY")
+    app.config["MAIL_TRANSPORT"] = os.environ.get(
+        "MAIL_TRANSPORT", "sendgrid" if app.config["SENDGRID_API_KEY"] else "log"
+    )
+    app.config["MAIL_FROM"] = os.environ.get("MAIL_FROM", "post@nawaratthaimat.no")
+    app.config["MAIL_TO"] = os.environ.get("MAIL_TO")  # Defaults to the restaurant e-mail
+    app.config["MAIL_FILE_DIR"] = os.environ.get(
+        "MAIL_FILE_DIR", os.path.join(app.instance_path, "mail")
+    )
+    app.config["MAIL_WORKERS"] = int(os.environ.get("MAIL_WORKERS", "2"))
+    app.config["MAIL_MAX_ATTEMPTS"] = int(os.environ.get("MAIL_MAX_ATTEMPTS", "5"))
+    app.config["MAIL_RETRY_DELAY"] = float(os.environ.get("MAIL_RETRY_DELAY", "2"))
+
+    # Opt-in request timing and slow-request log (see utils/instrumentation.py)
+    app.config["SQL_INSTRUMENTATION"] = os.environ.get("SQL_INSTRUMENTATION") == "1"
+    app.config["SLOW_REQUEST_MS"] = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+    app.config["SLOW_REQUEST_LOG_SIZE"] = int(
+        os.environ.get("SLOW_REQUEST_LOG_SIZE", "100")
+    )
+    # Seconds a logged-in user's identity is reused without a database lookup
+    app.config["IDENTITY_CACHE_TTL"] = float(os.environ.get("IDENTITY_CACHE_TTL", "30"))
+    # Admin login attempts allowed per client IP and per username, refilled
+    # per minute up to the burst size; "db" shares the buckets between
+    # workers (see login_guard.py)
+    app.config["LOGIN_THROTTLE_STORE"] = os.environ.get(
+        "LOGIN_THROTTLE_STORE", "memory"
+    )
+    app.config["LOGIN_IP_BURST"] = int(os.environ.get("LOGIN_IP_BURST", "20"))
+    app.config["LOGIN_IP_PER_MINUTE"] = float(
+        os.environ.get("LOGIN_IP_PER_MINUTE", "10")
+    )
+    app.config["LOGIN_USER_BURST"] = int(os.environ.get("LOGIN_USER_BURST", "5"))
+    app.config["LOGIN_USER_PER_MINUTE"] = float(
+        os.environ.get("LOGIN_USER_PER_MINUTE", "2")
+    )
+    # Catering inquiries (each sends mail) allowed per client IP, same buckets
+    app.config["INQUIRY_IP_BURST"] = int(os.environ.get("INQUIRY_IP_BURST", "5"))
+    app.config["INQUIRY_IP_PER_MINUTE"] = float(
+        os.environ.get("INQUIRY_IP_PER_MINUTE", "0.2")
+    )
+    # Password hashes checked at once per worker, and attempts allowed to wait
+    app.config["LOGIN_HASH_WORKERS"] = int(os.environ.get("LOGIN_HASH_WORKERS", "1"))
+    app.config["LOGIN_HASH_QUEUE"] = int(os.environ.get("LOGIN_HASH_QUEUE", "4"))
+    # Rendered {% cache %} blocks kept per worker; 0 disables (see
+    # utils/fragment_cache.py)
+    app.config["FRAGMENT_CACHE_SIZE"] = int(
+        os.environ.get("FRAGMENT_CACHE_SIZE", "2000")
+    )
+    # Compile templates and load the menu before serving the first request
+    app.config["WARMUP"] = os.environ.get("WARMUP") == "1"
+
+    # Database configuration
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Connection pool per worker; unset sizes keep SQLAlchemy's defaults (5 + 10)
+    app.config["DB_POOL_SIZE"] = _optional_int(os.environ.get("DB_POOL_SIZE"))
+    app.config["DB_MAX_OVERFLOW"] = _optional_int(os.environ.get("DB_MAX_OVERFLOW"))
+    app.config["DB_POOL_TIMEOUT"] = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    app.config["DB_POOL_RECYCLE"] = int(os.environ.get("DB_POOL_RECYCLE", "300"))
+    app.config["DB_POOL_PRE_PING"] = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+    # Public pages read from this replica when set (see utils/database.py)
+    app.config["DATABASE_REPLICA_URL"] = os.environ.get("DATABASE_REPLICA_URL")
+    # Seconds a browser keeps reading from the primary after it wrote something
+    app.config["DB_READ_YOUR_WRITES"] = float(
+        os.environ.get("DB_READ_YOUR_WRITES", "10")
+    )
+    app.config.update(config or {})
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS",
+        database.engine_options(app.config, app.config["SQLALCHEMY_DATABASE_URI"]),
+    )
+    if app.config["DATABASE_REPLICA_URL"]:
+        # Binds don't inherit SQLALCHEMY_ENGINE_OPTIONS
+        replica_url = app.config["DATABASE_REPLICA_URL"]
+        app.config.setdefault("SQLALCHEMY_BINDS", {})[database.REPLICA] = {
+            "url": replica_url,
+            **database.engine_options(app.config, replica_url),
+        }
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    assets.init_app(app)
+    fragment_cache.init_app(app)
+    if app.config["SQL_INSTRUMENTATION"]:
+        instrumentation.init_app(app)
+
+    from admin_routes import admin_bp
+    from commands import register_commands
+    from routes import public_bp
+
+    app.register_blueprint(public_bp)
+    app.register_blueprint(admin_bp)
+    register_commands(app)
+
+    if app.config["WARMUP"]:
+        warm_up(app)
+    return app
+
+
+def _optional_int(value):
+    return int(value) if value else None
+
+
+def warm_up(app):
+    """Compile templates and build the page snapshots before serving traffic"""
+    for name in app.jinja_env.list_templates(extensions=["html"]):
+        app.jinja_env.get_template(name)
+
+    from routes import menu_snapshot
+    from settings import get_settings
+
+    with app.app_context():
+        try:
+            menu_snapshot.get()
+            get_settings()
+        except Exception:
+            # A database that is down or not migrated yet must not stop the boot
+            logging.warning("Skipping snapshot warm-up", exc_info=True)
+        finally:
+            db.session.remove()
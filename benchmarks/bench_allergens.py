@@ -0,0 +1,57 @@
+"""Micro-benchmark: per-item cost of allergen parsing on the menu page.
+
+Before: every /meny render ran ``clean_description_and_extract_allergens`` on
+each item. After: the parsed values are stored on the row when it is saved and
+the page only reads them.
+
+    python benchmarks/bench_allergens.py [--items 500] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text import clean_description_and_extract_allergens  # noqa: E402
+
+SAMPLE_DESCRIPTIONS = [
+    "Paprika, løk og hjemmelaget saus. Allergener: 1,2,3,4,5,6,8",
+    "Bambus, paprika, basilikum, rød chilipasta og kokosmelk. Allergener: 7",
+    "Brokkoli, gulrot, løk, egg, østersaus og soyasaus. allergener: 1, 2, 4",
+    "Champignon, tomat, løk, sitronblad, sitrongress, lime og kokosmelk",
+    "",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    descriptions = [
+        SAMPLE_DESCRIPTIONS[i % len(SAMPLE_DESCRIPTIONS)] for i in range(args.items)
+    ]
+    rows = []
+    for description in descriptions:
+        clean, allergens = clean_description_and_extract_allergens(description)
+        rows.append(SimpleNamespace(clean_description=clean, allergens=allergens))
+
+    def parse_on_render():
+        for description in descriptions:
+            clean_description_and_extract_allergens(description)
+
+    def read_stored():
+        for row in rows:
+            (row.clean_description or "", row.allergens or "")
+
+    for label, func in [("parse on render", parse_on_render), ("read stored", read_stored)]:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{label:16} {best / args.items * 1e6:8.3f} µs/item")
+
+
+if __name__ == "__main__":
+    main()
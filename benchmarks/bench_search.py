@@ -0,0 +1,84 @@
+"""Micro-benchmark: menu search latency and incremental update cost.
+
+Fills a ``MenuSearchIndex`` with synthetic dishes (no database needed) and
+times typical customer queries, with and without allergen exclusion.
+
+    python benchmarks/bench_search.py [--items 5000] [--repeat 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from allergens import mask_of  # noqa: E402
+from search import MenuSearchIndex  # noqa: E402
+
+WORDS = (
+    "kylling biff svin scampi and tofu rød ris eggnudler glassnudler paprika løk "
+    "brokkoli gulrot basilikum chili hvitløk kokosmelk karri østersaus soyasaus "
+    "cashewnøtter ananas tomat sitrongress lime egg bambus ingefær peanøttsaus"
+).split()
+CATEGORIES = ["hovedretter", "ekstra", "dessert", "drikker", "alkohol"]
+QUERIES = [
+    ("kylling", ()),
+    ("rød karri", ()),
+    ("nudler", (1, 5)),
+    ("kyll", ()),
+    ("scampi hvitløk", (2,)),
+    ("", (1, 2, 3, 4, 5, 6, 7)),
+]
+
+
+def synthetic_doc(rng, item_id):
+    return {
+        "id": item_id,
+        "name": f"{item_id:04d}. " + " ".join(rng.sample(WORDS, 3)).capitalize(),
+        "description": ", ".join(rng.sample(WORDS, 6)),
+        "category": rng.choice(CATEGORIES),
+        "sort_order": rng.randrange(100),
+        "price": str(rng.randrange(40, 400)),
+        "allergen_mask": mask_of(rng.sample(range(1, 15), rng.randrange(0, 5))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    index = MenuSearchIndex()
+    start = time.perf_counter()
+    for item_id in range(1, args.items + 1):
+        index.upsert(synthetic_doc(rng, item_id))
+    index.search("")
+    print(f"build {args.items} items: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for query, exclude in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(query, mask_of(exclude))
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(
+            f"{query or '(all)':16} exclude={list(exclude)!s:22}"
+            f" p50 {timings[len(timings) // 2] * 1e6:7.1f} µs"
+            f"  p99 {timings[int(len(timings) * 0.99)] * 1e6:7.1f} µs"
+            f"  {len(results)} shown"
+        )
+
+    # One admin edit: re-index a single item, then the next search refreshes
+    start = time.perf_counter()
+    index.upsert(synthetic_doc(rng, 1))
+    index.search("kylling")
+    print(f"edit one item + next search: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Worker boot cost: importing the app, building it, and the first request.
+
+Each measurement runs in a fresh interpreter against a throwaway SQLite
+database, the way a gunicorn worker or a one-off script starts:
+
+- ``import app``: what every script importing models or ``db`` pays
+- ``import main``: a full worker boot (``main:app``)
+- ``first /meny``: latency of the first page served by that worker
+
+SQL statements issued during the boot are counted too.
+
+    python benchmarks/bench_startup.py [--runs 10] [--warmup]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+queries = []
+event.listen(Engine, "before_cursor_execute", lambda *a: queries.append(1))
+
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+import main
+booted = time.perf_counter()
+boot_queries = len(queries)
+main.app.test_client().get("/meny")
+served = time.perf_counter()
+
+print(json.dumps({
+    "import_app_ms": (imported - start) * 1000,
+    "import_main_ms": (booted - start) * 1000,
+    "first_request_ms": (served - booted) * 1000,
+    "boot_queries": boot_queries,
+}))
+"""
+
+SETUP = """
+import main, migrations
+with main.app.app_context():
+    migrations.upgrade()
+"""
+
+
+def run_python(code, env):
+    output = subprocess.check_output(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env=env,
+        text=True,
+        stderr=subprocess.DEVNULL,
+    )
+    return output.strip().splitlines()[-1] if output.strip() else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", action="store_true", help="Boot with WARMUP=1.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            SESSION_SECRET="benchmark",
+            WARMUP="1" if args.warmup else "0",
+        )
+        run_python(SETUP, env)
+        samples = [json.loads(run_python(PROBE, env)) for _ in range(args.runs)]
+
+    for key in samples[0]:
+        values = [sample[key] for sample in samples]
+        print(
+            f"{key:18} median {statistics.median(values):8.1f}"
+            f"  min {min(values):8.1f}  max {max(values):8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
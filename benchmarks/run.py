@@ -0,0 +1,425 @@
+"""Endpoint latency and scaling benchmark.
+
+Builds the app against a temporary SQLite database, seeds it with the
+restaurant's real catering packages and menu plus synthetic catalogs of the
+requested sizes, and drives public and admin routes through the Flask test
+client, both sequentially and from a multi-threaded load generator.
+
+    python benchmarks/run.py --sizes 1000,20000 --packages 300 --output bench.json
+
+Per route it reports p50/p95/p99 latency, throughput, SQL queries per
+request and the process's peak RSS, as JSON so runs can be diffed. With
+``--explain`` it also records the query plan of every SELECT a route issues
+on its first (uncached) request.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PUBLIC_ROUTES = ["/", "/meny", "/catering", "/kontakt"]
+ADMIN_ROUTES = ["/admin/", "/admin/menu", "/admin/catering", "/admin/restaurant-info"]
+CATEGORIES = ["hovedretter", "ekstra", "dessert", "drikker", "alkohol"]
+WORDS = (
+    "kylling biff svin scampi and tofu ris nudler paprika løk brokkoli gulrot "
+    "basilikum chili hvitløk kokosmelk karri østersaus soyasaus cashewnøtter "
+    "ananas tomat sitrongress lime egg bambus ingefær koriander peanøtter"
+).split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="0,1000,20000",
+        help="Comma-separated synthetic MenuItem counts (0 = real menu only).",
+    )
+    parser.add_argument("--packages", type=int, default=200, help="Synthetic packages.")
+    parser.add_argument("--requests", type=int, default=50, help="Sequential requests per route.")
+    parser.add_argument("--threads", type=int, default=8, help="Load generator threads.")
+    parser.add_argument(
+        "--load-requests", type=int, default=400, help="Total concurrent requests per route."
+    )
+    parser.add_argument("--routes", help="Comma-separated subset of routes to run.")
+    parser.add_argument(
+        "--explain", action="store_true", help="Record query plans per route."
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON here instead of stdout.")
+    return parser.parse_args()
+
+
+def create_app(database_path):
+    """Build the app against a throwaway database"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ.setdefault("SESSION_SECRET", "benchmark")
+    os.environ.setdefault("MAIL_TRANSPORT", "log")
+
+    import logging
+
+    logging.disable(logging.WARNING)
+    import app as app_module
+    import migrations
+
+    app = app_module.create_app({"WTF_CSRF_ENABLED": False})
+    with app.app_context():
+        migrations.upgrade()
+    return app
+
+
+class QueryCounter:
+    """Counts SQL statements per thread via SQLAlchemy engine events"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+
+def seed(app, size, packages, rng):
+    """Replace all content with the real menu plus synthetic rows"""
+    from app import db
+    from content import CATERING, MENU, SETTINGS, bump_version
+    from catering import dish_index, set_package_items
+    from models import (
+        CateringPackage,
+        CateringPackageItem,
+        MenuItem,
+        RestaurantInfo,
+        User,
+    )
+    from routes import build_menu_data
+
+    with app.app_context():
+        CateringPackageItem.query.delete()
+        MenuItem.query.delete()
+        CateringPackage.query.delete()
+        RestaurantInfo.query.delete()
+        db.session.commit()
+
+        # build_menu_data() falls back to the printed menu on an empty table
+        real_menu = build_menu_data()
+        sort_order = 0
+        for category, items in real_menu.items():
+            for data in items:
+                sort_order += 1
+                item = MenuItem(
+                    name=data["name"],
+                    category=category,
+                    subcategory=data.get("subcategory"),
+                    image_filename=data.get("image"),
+                    sort_order=sort_order,
+                    is_active=True,
+                )
+                item.set_price(data["price"])
+                description = data.get("description") or ""
+                if data.get("allergens"):
+                    description += f". Allergener: {data['allergens']}"
+                item.set_description(description)
+                db.session.add(item)
+
+        for i in range(size):
+            item = MenuItem(
+                name=f"{i:05d}. " + " ".join(rng.sample(WORDS, 3)).capitalize(),
+                category=rng.choice(CATEGORIES),
+                sort_order=rng.randrange(0, 100),
+                is_active=rng.random() > 0.1,
+            )
+            item.set_price(str(rng.randrange(40, 400)))
+            allergens = ",".join(
+                str(n) for n in sorted(rng.sample(range(1, 15), rng.randrange(0, 5)))
+            )
+            item.set_description(
+                ", ".join(rng.sample(WORDS, 6)).capitalize()
+                + (f". Allergener: {allergens}" if allergens else "")
+            )
+            db.session.add(item)
+
+        import init_catering
+
+        # Packages go through the same setters as admin saves, so they get
+        # prices in øre, allergen masks and content rows linked to the menu
+        db.session.flush()
+        dishes = dish_index()
+        real_packages = init_catering.PACKAGES
+        for i in range(max(packages, len(real_packages))):
+            data = dict(real_packages[i % len(real_packages)])
+            if i >= len(real_packages):
+                data["name"] = f"{data['name']} #{i}"
+                data["sort_order"] = i
+            package = CateringPackage(
+                is_active=True,
+                name=data["name"],
+                description=data["description"],
+                min_persons=data["min_persons"],
+                best_for=data["best_for"],
+                sort_order=data["sort_order"],
+            )
+            package.set_price_per_person(data["price_per_person"])
+            package.set_allergens(data["allergens"])
+            set_package_items(package, data["items"], dishes)
+            db.session.add(package)
+
+        if not User.query.filter_by(username="bench").first():
+            user = User(username="bench", email="bench@example.com", is_admin=True)
+            user.set_password("bench-password")
+            db.session.add(user)
+
+        for name in (MENU, CATERING, SETTINGS):
+            bump_version(name)
+        db.session.commit()
+        # Fresh statistics, as autovacuum would have gathered in production
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+        return MenuItem.query.count(), CateringPackage.query.count()
+
+
+def explain_route(app, route):
+    """Query plans of the SELECTs issued while serving route once"""
+    from sqlalchemy import event
+
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    client = make_client(app, route.startswith("/admin"))
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        client.get(route)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    sqlite = engine.dialect.name == "sqlite"
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in captured:
+            prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN "
+            rows = connection.exec_driver_sql(prefix + statement, parameters).all()
+            plans.append(
+                {
+                    "sql": " ".join(statement.split()),
+                    "plan": [row[-1] if sqlite else row[0] for row in rows],
+                }
+            )
+    return plans
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(latencies, wall_time=None):
+    values = sorted(latencies)
+    summary = {
+        "requests": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+    }
+    summary["throughput_rps"] = round(len(values) / (wall_time or sum(values)), 1)
+    return summary
+
+
+_admin_cookies = {}
+_login_lock = threading.Lock()
+
+
+def admin_session_cookie(app):
+    """Log in once per app and reuse the session, like a real admin browser.
+
+    Logging in from every load thread would hit the login throttle and the
+    bounded password-hash pool (see login_guard.py), not the measured route.
+    """
+    with _login_lock:
+        if app not in _admin_cookies:
+            client = app.test_client()
+            response = client.post(
+                "/admin/login",
+                data={"username": "bench", "password": "bench-password"},
+            )
+            assert response.status_code == 302, "admin login failed"
+            _admin_cookies[app] = client.get_cookie("session").value
+        return _admin_cookies[app]
+
+
+def make_client(app, admin):
+    client = app.test_client()
+    if admin:
+        client.set_cookie("session", admin_session_cookie(app))
+    return client
+
+
+def run_sequential(app, counter, route, count, headers=None):
+    client = make_client(app, route.startswith("/admin"))
+    latencies, queries = [], []
+
+    counter.reset()
+    start = time.perf_counter()
+    response = client.get(route, headers=headers)
+    cold_ms = (time.perf_counter() - start) * 1000
+    status = response.status_code
+
+    for _ in range(count):
+        counter.reset()
+        start = time.perf_counter()
+        client.get(route, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        queries.append(counter.count)
+
+    result = summarize(latencies)
+    result.update(
+        status=status,
+        cold_ms=round(cold_ms, 3),
+        queries_per_request=round(statistics.fmean(queries), 2),
+    )
+    return result
+
+
+def run_concurrent(app, route, threads, total, headers=None):
+    admin = route.startswith("/admin")
+    local = threading.local()
+    latencies = []
+    lock = threading.Lock()
+
+    def one_request(_):
+        if not hasattr(local, "client"):
+            local.client = make_client(app, admin)
+        start = time.perf_counter()
+        local.client.get(route, headers=headers)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one_request, range(total)))
+    wall_time = time.perf_counter() - start
+
+    result = summarize(latencies, wall_time)
+    result["threads"] = threads
+    return result
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    routes = args.routes.split(",") if args.routes else PUBLIC_ROUTES + ADMIN_ROUTES
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(os.path.join(tmp, "bench.db"))
+        from app import db
+
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+
+        results = []
+        for size in [int(s) for s in args.sizes.split(",")]:
+            menu_items, packages = seed(app, size, args.packages, rng)
+            print(
+                f"catalog: {menu_items} menu items, {packages} packages", file=sys.stderr
+            )
+
+            for route in routes:
+                # Before any other request, while page snapshots are still cold
+                plans = explain_route(app, route) if args.explain else None
+                cases = [(route, None)]
+                if not route.startswith("/admin"):
+                    etag = app.test_client().get(route).headers.get("ETag")
+                    if etag:
+                        cases.append((f"{route} (304)", {"If-None-Match": etag}))
+
+                for label, headers in cases:
+                    path = label.split(" ")[0]
+                    result = {
+                        "route": label,
+                        "menu_items": menu_items,
+                        "packages": packages,
+                        "peak_rss_mb": peak_rss_mb(),
+                        "sequential": run_sequential(
+                            app, counter, path, args.requests, headers
+                        ),
+                        "concurrent": run_concurrent(
+                            app, path, args.threads, args.load_requests, headers
+                        ),
+                    }
+                    if plans is not None and headers is None:
+                        result["query_plans"] = plans
+                    results.append(result)
+                    print(
+                        f"  {label:28} p50 {result['sequential']['p50_ms']:8.2f} ms"
+                        f"  p99 {result['sequential']['p99_ms']:8.2f} ms"
+                        f"  {result['concurrent']['throughput_rps']:8.1f} req/s"
+                        f"  {result['sequential']['queries_per_request']:5.1f} queries",
+                        file=sys.stderr,
+                    )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
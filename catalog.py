@@ -0,0 +1,374 @@
+"""Bulk import and export of menu items and catering packages.
+
+Rows are matched on ``name``. An import is validated and diffed against the
+database first; applying it writes every new and changed row with batched
+INSERT/UPDATE statements in one transaction, so a bad file changes nothing.
+Exports stream rows from the database in chunks instead of loading the whole
+table.
+
+CSV and JSON use the same field names; see ``KINDS`` for the columns.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from allergens import parse_mask, unknown_numbers
+from app import db
+from catering import (
+    WITH_CONTENTS_IN,
+    current_items_text,
+    packages_contain,
+    relink_packages,
+)
+from content import CATERING, MENU, bump_version
+from models import CateringPackage, MenuItem
+from prices import parse_price
+from utils.text import clean_description_and_extract_allergens
+
+BATCH_SIZE = 500
+TRUE_VALUES = {"1", "true", "ja", "yes", "y", "x"}
+FALSE_VALUES = {"", "0", "false", "nei", "no", "n"}
+
+
+class Kind:
+    """What one importable table looks like"""
+
+    def __init__(self, model, fields, content, required):
+        self.model = model
+        self.fields = fields
+        self.content = content
+        self.required = required
+
+    def order_by(self):
+        return (self.model.sort_order, self.model.name, self.model.id)
+
+
+KINDS = {
+    "menu": Kind(
+        MenuItem,
+        (
+            "name",
+            "category",
+            "subcategory",
+            "price",
+            "description",
+            "image_filename",
+            "sort_order",
+            "is_active",
+        ),
+        MENU,
+        required=("name", "category", "price"),
+    ),
+    "catering": Kind(
+        CateringPackage,
+        (
+            "name",
+            "price_per_person",
+            "description",
+            "items",
+            "min_persons",
+            "allergens",
+            "best_for",
+            "sort_order",
+            "is_active",
+        ),
+        CATERING,
+        required=("name", "price_per_person", "items"),
+    ),
+}
+
+INTEGER_FIELDS = {"sort_order", "min_persons"}
+BOOLEAN_FIELDS = {"is_active"}
+PRICE_FIELDS = {"price", "price_per_person"}
+
+
+class CatalogImportError(ValueError):
+    """The file could not be imported; ``errors`` lists every problem found"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def read_rows(data, format):
+    """Parse CSV or JSON text into a list of dicts"""
+    if format == "csv":
+        return list(csv.DictReader(io.StringIO(data.lstrip("\ufeff"))))
+    if format == "json":
+        try:
+            rows = json.loads(data)
+        except json.JSONDecodeError as exc:
+            raise CatalogImportError([f"Ugyldig JSON: {exc}"]) from exc
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise CatalogImportError(["JSON-filen må være en liste med objekter"])
+        return rows
+    raise CatalogImportError([f"Ukjent filformat: {format}"])
+
+
+def _convert(kind, field, value):
+    column = kind.model.__table__.c[field]
+    if field in BOOLEAN_FIELDS:
+        if isinstance(value, bool):
+            return value
+        text = str(value if value is not None else "").strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f"{field}: '{value}' er ikke ja/nei")
+    if field in INTEGER_FIELDS:
+        if value in (None, ""):
+            return column.default.arg if column.default is not None else None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field}: '{value}' er ikke et heltall") from None
+
+    value = "" if value is None else str(value).strip()
+    if not value and field not in kind.required:
+        return None
+    length = getattr(column.type, "length", None)
+    if length and len(value) > length:
+        raise ValueError(f"{field}: lengre enn {length} tegn")
+    if field in PRICE_FIELDS and parse_price(value) is None:
+        raise ValueError(f"{field}: '{value}' inneholder ingen pris")
+    if field == "allergens" and unknown_numbers(value):
+        unknown = ", ".join(map(str, unknown_numbers(value)))
+        raise ValueError(f"{field}: ukjent allergen {unknown}")
+    return value
+
+
+def clean_rows(kind, rows):
+    """Validate and convert raw rows; raise CatalogImportError listing all problems"""
+    errors = []
+    cleaned = []
+    seen = set()
+
+    for number, row in enumerate(rows, start=1):
+        unknown = set(row) - set(kind.fields)
+        if unknown:
+            errors.append(f"Rad {number}: ukjente felt {', '.join(sorted(unknown))}")
+            continue
+
+        values = {}
+        for field in kind.fields:
+            if field not in row:
+                if field in kind.required:
+                    errors.append(f"Rad {number}: mangler {field}")
+                continue
+            try:
+                values[field] = _convert(kind, field, row[field])
+            except ValueError as exc:
+                errors.append(f"Rad {number}: {exc}")
+                continue
+            if field in kind.required and not values[field]:
+                errors.append(f"Rad {number}: {field} kan ikke være tom")
+
+        name = values.get("name")
+        if name and name in seen:
+            errors.append(f"Rad {number}: '{name}' finnes flere ganger i filen")
+        seen.add(name)
+        cleaned.append(values)
+
+    if errors:
+        raise CatalogImportError(errors)
+    return cleaned
+
+
+def _existing_rows(kind, names):
+    """Current rows by name, looked up in batches (first id wins on duplicates)"""
+    columns = [kind.model.id] + [kind.model.__table__.c[f] for f in kind.fields]
+    existing = {}
+    names = list(names)
+    for start in range(0, len(names), BATCH_SIZE):
+        result = db.session.execute(
+            select(*columns)
+            .where(kind.model.name.in_(names[start : start + BATCH_SIZE]))
+            .order_by(kind.model.id)
+        )
+        for row in result.mappings():
+            existing.setdefault(row["name"], dict(row))
+    return existing
+
+
+def plan_import(kind, rows):
+    """Compare cleaned rows with the database.
+
+    Returns a list of ``{"action", "name", "values", "id", "changes"}`` where
+    action is ``create``, ``update`` or ``unchanged`` and changes maps each
+    changed field to ``(old, new)``.
+    """
+    existing = _existing_rows(kind, [row["name"] for row in rows])
+    plan = []
+    for values in rows:
+        current = existing.get(values["name"])
+        changes = {}
+        if current is not None:
+            changes = {
+                field: (current[field], new)
+                for field, new in values.items()
+                if current[field] != new
+            }
+        if current is None:
+            action = "create"
+        else:
+            action = "update" if changes else "unchanged"
+        plan.append(
+            {
+                "action": action,
+                "name": values["name"],
+                "values": values,
+                "id": current["id"] if current else None,
+                "changes": changes,
+            }
+        )
+    return plan
+
+
+def _derived_values(kind, values):
+    """Columns computed from the imported ones, as the admin forms do"""
+    derived = {}
+    if kind.model is MenuItem:
+        if "description" in values:
+            clean_description, allergens = clean_description_and_extract_allergens(
+                values["description"]
+            )
+            derived["clean_description"] = clean_description
+            derived["allergens"] = allergens
+            derived["allergen_mask"] = parse_mask(allergens)
+        if "price" in values:
+            derived["price_ore"] = parse_price(values["price"])
+    else:
+        if "allergens" in values:
+            derived["allergen_mask"] = parse_mask(values["allergens"])
+        if "price_per_person" in values:
+            derived["price_per_person_ore"] = parse_price(values["price_per_person"])
+    return derived
+
+
+def apply_plan(kind, plan):
+    """Write a plan's creates and updates in batches; the caller commits"""
+    now = datetime.utcnow()
+    inserts = []
+    updates = []
+    for entry in plan:
+        if entry["action"] == "create":
+            values = dict(entry["values"], created_at=now, updated_at=now)
+            values.update(_derived_values(kind, entry["values"]))
+            inserts.append(values)
+        elif entry["action"] == "update":
+            changed = {field: new for field, (_old, new) in entry["changes"].items()}
+            values = dict(changed, id=entry["id"], updated_at=now)
+            values.update(_derived_values(kind, changed))
+            updates.append(values)
+
+    for start in range(0, len(inserts), BATCH_SIZE):
+        db.session.execute(insert(kind.model), inserts[start : start + BATCH_SIZE])
+    for start in range(0, len(updates), BATCH_SIZE):
+        db.session.execute(update(kind.model), updates[start : start + BATCH_SIZE])
+    if inserts or updates:
+        bump_version(kind.content)
+
+    if kind.model is CateringPackage:
+        # New dish lists become content rows linked to matching menu items
+        names = [
+            entry["name"]
+            for entry in plan
+            if entry["action"] == "create" or "items" in entry["changes"]
+        ]
+        for start in range(0, len(names), BATCH_SIZE):
+            relink_packages(
+                db.session.scalars(
+                    select(CateringPackage)
+                    .where(CateringPackage.name.in_(names[start : start + BATCH_SIZE]))
+                    .options(WITH_CONTENTS_IN)
+                )
+            )
+    elif updates and packages_contain(values["id"] for values in updates):
+        # Packages show linked dishes under their current name
+        bump_version(CATERING)
+
+
+def import_rows(kind_name, rows, dry_run=False):
+    """Validate, diff and (unless dry_run) upsert rows in one transaction.
+
+    Returns the plan from ``plan_import``.
+    """
+    kind = KINDS[kind_name]
+    plan = plan_import(kind, clean_rows(kind, rows))
+    if dry_run:
+        return plan
+    try:
+        apply_plan(kind, plan)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return plan
+
+
+def summarize(plan):
+    counts = {"create": 0, "update": 0, "unchanged": 0}
+    for entry in plan:
+        counts[entry["action"]] += 1
+    return counts
+
+
+def iter_rows(kind_name):
+    """Yield every row as a dict, fetched from the database in chunks"""
+    kind = KINDS[kind_name]
+    columns = [kind.model.id] + [kind.model.__table__.c[f] for f in kind.fields]
+    # Package dishes as shown on the site, with linked dishes' current names
+    contents = current_items_text() if kind.model is CateringPackage else {}
+    result = db.session.execute(
+        select(*columns)
+        .order_by(*kind.order_by())
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for row in result.mappings():
+        row = dict(row)
+        row_id = row.pop("id")
+        if row_id in contents:
+            row["items"] = contents[row_id]
+        yield row
+
+
+def stream_csv(kind_name):
+    """Yield CSV text in chunks of up to BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=KINDS[kind_name].fields)
+    # The byte order mark makes Excel read the file as UTF-8 (æ, ø, å)
+    buffer.write("\ufeff")
+    writer.writeheader()
+    for count, row in enumerate(iter_rows(kind_name), start=1):
+        if "is_active" in row:
+            row["is_active"] = "ja" if row["is_active"] else "nei"
+        writer.writerow(row)
+        if count % BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_json(kind_name):
+    """Yield a JSON array in chunks of up to BATCH_SIZE rows"""
+    chunk = ["["]
+    for count, row in enumerate(iter_rows(kind_name)):
+        separator = ",\n" if count else "\n"
+        chunk.append(separator + json.dumps(row, ensure_ascii=False))
+        if len(chunk) >= BATCH_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("\n]\n")
+    yield "".join(chunk)
+
+
+FORMATS = {
+    "csv": ("text/csv", stream_csv),
+    "json": ("application/json", stream_json),
+}
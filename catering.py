@@ -0,0 +1,97 @@
+"""Catering package contents as ordered rows that can point at menu items.
+
+Admins still type a package's dishes one per line. Each line becomes a
+``CateringPackageItem``; a line naming an existing menu item (compared
+without dish number, case or accents) links to it, so renaming that dish
+renames it in every package. Other lines are kept as free text.
+"""
+
+from sqlalchemy import case, exists, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import db
+from models import CateringPackage, CateringPackageItem, MenuItem
+from utils.text import fold_text, split_dish_number
+
+# Eager loading for anything that shows package contents
+WITH_CONTENTS = joinedload(CateringPackage.contents).joinedload(
+    CateringPackageItem.menu_item
+)
+WITH_CONTENTS_IN = selectinload(CateringPackage.contents).joinedload(
+    CateringPackageItem.menu_item
+)
+
+
+def dish_key(name):
+    """'07. Rød Karri  m/ And' -> 'rod karri m/ and'"""
+    _number, name = split_dish_number(name or "")
+    return " ".join(fold_text(name).split())
+
+
+def dish_index():
+    """Menu item id by dish key; catering dishes win over the public menu"""
+    rows = db.session.execute(
+        select(MenuItem.id, MenuItem.name).order_by(
+            case((MenuItem.category == "catering", 0), else_=1), MenuItem.id
+        )
+    )
+    index = {}
+    for item_id, name in rows:
+        index.setdefault(dish_key(name), item_id)
+    return index
+
+
+def set_package_items(package, text, dishes=None):
+    """Store the typed lines and rebuild the package's content rows"""
+    if dishes is None:
+        dishes = dish_index()
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    package.items = "\n".join(lines)
+    package.contents = [
+        CateringPackageItem(
+            position=position, name=line, menu_item_id=dishes.get(dish_key(line))
+        )
+        for position, line in enumerate(lines)
+    ]
+
+
+def items_text(package):
+    """The contents one per line, with linked dishes under their current name"""
+    return "\n".join(entry.display_name for entry in package.contents)
+
+
+def current_items_text():
+    """items_text() of every package that has content rows, by package id"""
+    packages = db.session.scalars(select(CateringPackage).options(WITH_CONTENTS_IN))
+    return {package.id: items_text(package) for package in packages if package.contents}
+
+
+def relink_packages(packages):
+    """Rebuild content rows from each package's items text"""
+    dishes = dish_index()
+    for package in packages:
+        set_package_items(package, package.items, dishes)
+
+
+def packages_contain(menu_item_ids):
+    """True if any package links to one of the menu items"""
+    return db.session.scalar(
+        select(
+            exists().where(CateringPackageItem.menu_item_id.in_(list(menu_item_ids)))
+        )
+    )
+
+
+def active_packages():
+    """Active packages in page order with their contents, in one query"""
+    return (
+        db.session.scalars(
+            select(CateringPackage)
+            # "= 1", not "IS 1", matches the predicate of the partial index
+            .where(CateringPackage.is_active == True)  # noqa: E712
+            .order_by(CateringPackage.sort_order, CateringPackage.name)
+            .options(WITH_CONTENTS)
+        )
+        .unique()
+        .all()
+    )
@@ -0,0 +1,177 @@
+"""Flask CLI commands (run with ``flask --app main <command>``)."""
+
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+import migrations
+from app import db
+from catalog import (
+    FORMATS,
+    KINDS,
+    CatalogImportError,
+    import_rows,
+    read_rows,
+    summarize,
+)
+from content import MENU, bump_version
+from export import PAGES, export_pages
+from mailer import deliver_inquiry
+from models import CateringInquiry, MenuItem
+from utils.assets import compress_static, write_asset_manifest
+from utils.images import build_derivatives, find_missing_images
+
+
+db_cli = AppGroup("db", help="Database schema management.")
+
+
+@db_cli.command("upgrade")
+def upgrade_command():
+    """Create missing tables and columns and backfill derived data."""
+    migrations.upgrade()
+    click.echo("Database schema is up to date.")
+
+
+@click.command("backfill-allergens")
+@click.option(
+    "--all", "recompute_all", is_flag=True, help="Re-parse every row, not only new ones."
+)
+@with_appcontext
+def backfill_allergens_command(recompute_all):
+    """Parse allergen info out of stored menu item descriptions."""
+    bump_version(MENU)
+    count = migrations.backfill_allergens(only_missing=not recompute_all)
+    click.echo(f"Updated allergen info for {count} menu items.")
+
+
+@click.command("export")
+@click.option("--out", "out_dir", help="Output directory (default: STATIC_EXPORT_DIR).")
+@click.argument("urls", nargs=-1)
+@with_appcontext
+def export_command(out_dir, urls):
+    """Render public pages (default: all) to static HTML files."""
+    out_dir = out_dir or current_app.config.get("STATIC_EXPORT_DIR")
+    if not out_dir:
+        raise click.UsageError("Set STATIC_EXPORT_DIR or pass --out.")
+    for path in export_pages(out_dir, urls or PAGES):
+        click.echo(f"Wrote {path}")
+
+
+catalog_cli = AppGroup("catalog", help="Bulk import/export of menu and catering.")
+
+
+@catalog_cli.command("import")
+@click.argument("kind", type=click.Choice(sorted(KINDS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--dry-run", is_flag=True, help="Only show what would change.")
+def import_catalog_command(kind, path, dry_run):
+    """Upsert rows from a CSV or JSON file, matched on name."""
+    format = os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, encoding="utf-8") as f:
+        data = f.read()
+    try:
+        plan = import_rows(kind, read_rows(data, format), dry_run=dry_run)
+    except CatalogImportError as exc:
+        for error in exc.errors:
+            click.echo(error, err=True)
+        raise SystemExit(1) from None
+
+    for entry in plan:
+        if entry["action"] == "create":
+            click.echo(f"+ {entry['name']}")
+        elif entry["action"] == "update":
+            click.echo(f"~ {entry['name']}: {', '.join(entry['changes'])}")
+    counts = summarize(plan)
+    click.echo(
+        f"{'Would create' if dry_run else 'Created'} {counts['create']}, "
+        f"{'update' if dry_run else 'updated'} {counts['update']}, "
+        f"{counts['unchanged']} unchanged."
+    )
+
+
+@catalog_cli.command("export")
+@click.argument("kind", type=click.Choice(sorted(KINDS)))
+@click.option("--format", "format", type=click.Choice(sorted(FORMATS)), default="csv")
+@click.option("--out", type=click.File("w", encoding="utf-8"), default="-")
+def export_catalog_command(kind, format, out):
+    """Write every row as CSV or JSON (to stdout by default)."""
+    _mimetype, stream = FORMATS[format]
+    for chunk in stream(kind):
+        out.write(chunk)
+
+
+assets_cli = AppGroup("assets", help="Static asset build steps.")
+
+
+@assets_cli.command("build")
+def build_assets_command():
+    """Fingerprint static/ and write precompressed .br/.gz siblings."""
+    manifest = write_asset_manifest(current_app.static_folder)
+    click.echo(f"Fingerprinted {len(manifest)} static files.")
+    written = compress_static(current_app.static_folder)
+    click.echo(f"Wrote {written} precompressed files.")
+
+
+images_cli = AppGroup("images", help="Responsive image derivatives.")
+
+
+@images_cli.command("build")
+def build_images_command():
+    """Write resized WebP/JPEG copies of static/images and their manifest."""
+    manifest = build_derivatives(current_app.static_folder)
+    click.echo(f"Built derivatives for {len(manifest)} images.")
+    _report_missing_images()
+
+
+@images_cli.command("check")
+def check_images_command():
+    """List images referenced by templates or menu items that do not exist."""
+    if _report_missing_images():
+        raise SystemExit(1)
+
+
+def _report_missing_images():
+    filenames = db.session.execute(db.select(MenuItem.image_filename)).scalars()
+    missing = find_missing_images(
+        current_app.static_folder,
+        os.path.join(current_app.root_path, current_app.template_folder),
+        filenames,
+    )
+    for path, source in missing:
+        click.echo(f"Missing image {path} (referenced from {source})", err=True)
+    return missing
+
+
+mail_cli = AppGroup("mail", help="Catering inquiry notifications.")
+
+
+@mail_cli.command("retry")
+@click.option("--failed", is_flag=True, help="Also retry inquiries that gave up.")
+def retry_mail_command(failed):
+    """Deliver inquiries still pending, e.g. after a restart."""
+    statuses = ["pending", "failed"] if failed else ["pending"]
+    inquiries = CateringInquiry.query.filter(CateringInquiry.status.in_(statuses)).all()
+    for inquiry in inquiries:
+        if inquiry.status == "failed":
+            inquiry.status = "pending"
+            inquiry.attempts = 0
+    db.session.commit()
+
+    for inquiry in inquiries:
+        deliver_inquiry(current_app._get_current_object(), inquiry.id)
+    click.echo(f"Retried {len(inquiries)} inquiries.")
+
+
+def register_commands(app):
+    for command in (
+        db_cli,
+        backfill_allergens_command,
+        export_command,
+        catalog_cli,
+        assets_cli,
+        images_cli,
+        mail_cli,
+    ):
+        app.cli.add_command(command)
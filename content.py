@@ -0,0 +1,168 @@
+"""Versioned in-process snapshots of public content.
+
+Admin writes bump a per-area version number stored in the database, so every
+gunicorn worker notices the change on its next request and rebuilds its own
+snapshot exactly once.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from types import MappingProxyType
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import db
+from models import ContentVersion
+
+# Content areas with their own version counter
+MENU = "menu"
+CATERING = "catering"
+SETTINGS = "settings"
+
+# Dialects whose INSERT ... ON CONFLICT bump_version uses
+UPSERT_DIALECTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+# Callbacks run with the set of changed content areas after each commit
+_change_listeners = []
+
+
+def current_versions():
+    """Return all stored version numbers, read once per request"""
+    if has_request_context() and "content_versions" in g:
+        return g.content_versions
+
+    versions = dict(
+        db.session.execute(select(ContentVersion.name, ContentVersion.version)).all()
+    )
+    if has_request_context():
+        g.content_versions = versions
+    return versions
+
+
+def current_version(name):
+    """Return the stored version number for a content area (0 if never bumped)."""
+    return current_versions().get(name, 0)
+
+
+def bump_version(name):
+    """Mark a content area as changed. Takes effect when the session commits."""
+    dialect = db.session.get_bind(clause=update(ContentVersion)).dialect.name
+    if dialect in UPSERT_DIALECTS:
+        # One statement, so two first bumps can't both insert the row
+        insert = UPSERT_DIALECTS[dialect]
+        statement = insert(ContentVersion).values(
+            name=name, version=1, updated_at=datetime.utcnow()
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ContentVersion.name],
+                set_={
+                    "version": ContentVersion.version + 1,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+        )
+    else:
+        result = db.session.execute(
+            update(ContentVersion)
+            .where(ContentVersion.name == name)
+            .values(version=ContentVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            db.session.add(ContentVersion(name=name, version=1))
+    g.pop("content_versions", None)
+    db.session.info.setdefault("changed_content", set()).add(name)
+
+
+def on_content_change(f):
+    """Register ``f(names)`` to run after a commit that bumped content versions"""
+    _change_listeners.append(f)
+    return f
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_content_change(session):
+    names = session.info.pop("changed_content", None)
+    if not names:
+        return
+    for listener in _change_listeners:
+        try:
+            listener(frozenset(names))
+        except Exception:
+            # A failing listener must not turn a successful save into an error
+            logging.exception("Content change listener %r failed", listener)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_content_change(session):
+    session.info.pop("changed_content", None)
+
+
+def content_timestamp(models, versions=()):
+    """Return (newest updated_at, version sum) for the given content in one query.
+
+    The version sum catches deletions, which leave no ``updated_at`` behind.
+    """
+    columns = [select(func.max(model.updated_at)).scalar_subquery() for model in models]
+    if versions:
+        in_versions = ContentVersion.name.in_(versions)
+        columns.append(
+            select(func.max(ContentVersion.updated_at))
+            .where(in_versions)
+            .scalar_subquery()
+        )
+        columns.append(
+            select(func.coalesce(func.sum(ContentVersion.version), 0))
+            .where(in_versions)
+            .scalar_subquery()
+        )
+    row = db.session.execute(select(*columns)).one()
+
+    timestamps = row[: len(models) + (1 if versions else 0)]
+    version_sum = row[-1] if versions else 0
+    newest = max((stamp for stamp in timestamps if stamp is not None), default=None)
+    return newest, version_sum
+
+
+def freeze(value):
+    """Recursively turn dicts and lists into read-only equivalents."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class VersionedSnapshot:
+    """Immutable value rebuilt only when its content version changes.
+
+    On a miss, concurrent callers wait on a lock so that only one of them runs
+    the (database-heavy) builder.
+    """
+
+    def __init__(self, name, builder):
+        self.name = name
+        self._builder = builder
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = current_version(self.name)
+        # (version, value) per app, so apps on different databases never
+        # see each other's content
+        snapshots = current_app.extensions.setdefault("content_snapshots", {})
+        entry = snapshots.get(self)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        with self._lock:
+            # Another thread may have rebuilt while we were waiting
+            entry = snapshots.get(self)
+            if entry is None or entry[0] != version:
+                entry = (version, freeze(self._builder()))
+                snapshots[self] = entry
+        return entry[1]
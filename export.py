@@ -0,0 +1,87 @@
+"""Pre-render the public pages to HTML files that nginx can serve directly.
+
+``flask export`` renders every page into ``STATIC_EXPORT_DIR`` (or
+``--out``). When ``STATIC_EXPORT_DIR`` is configured, admin saves re-render
+only the pages showing the changed content. That happens synchronously,
+inside the admin request that committed the change, so the save returns
+once the files are up to date. Files are swapped in atomically, so nginx
+never serves a half-written page. Example nginx config:
+
+    location / {
+        try_files $uri/index.html $uri @flask;
+        # nginx answers POST to a static file with 405; hand it to Flask
+        # instead, or the catering inquiry form would never arrive
+        error_page 405 = @flask;
+    }
+"""
+
+import logging
+import os
+import tempfile
+
+from flask import current_app
+
+from content import CATERING, MENU, SETTINGS, on_content_change
+from utils.database import READ_PRIMARY
+
+PAGES = ("/", "/meny", "/catering", "/kontakt")
+
+# Content area -> pages that show it (settings appear in every footer)
+AFFECTED_PAGES = {
+    MENU: ("/meny",),
+    CATERING: ("/catering",),
+    SETTINGS: PAGES,
+}
+
+
+def output_path(out_dir, url):
+    """'/meny' -> <out_dir>/meny/index.html"""
+    return os.path.join(out_dir, url.strip("/"), "index.html")
+
+
+def _atomic_write(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".export-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_pages(out_dir, urls=PAGES):
+    """Render the given public pages into out_dir; return the paths written"""
+    app = current_app._get_current_object()
+    client = app.test_client()
+    written = []
+    # A fresh app context gives the renders their own database session, even
+    # when called from an admin request whose session has just committed
+    with app.app_context():
+        for url in urls:
+            # Read from the primary: a replica may not have the change yet
+            response = client.get(url, environ_base={READ_PRIMARY: True})
+            if response.status_code != 200:
+                logging.error("Export of %s failed with status %s", url, response.status)
+                continue
+            path = output_path(out_dir, url)
+            _atomic_write(path, response.get_data())
+            written.append(path)
+    return written
+
+
+def pages_for(names):
+    """Pages that show any of the given content areas, in PAGES order"""
+    affected = {url for name in names for url in AFFECTED_PAGES.get(name, PAGES)}
+    return [url for url in PAGES if url in affected]
+
+
+@on_content_change
+def refresh_exported_pages(names):
+    """Re-render the affected pages; runs in the request that committed"""
+    out_dir = current_app.config.get("STATIC_EXPORT_DIR")
+    if out_dir:
+        export_pages(out_dir, pages_for(names))
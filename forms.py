@@ -1,6 +1,27 @@
 from flask_wtf import FlaskForm
-from wtforms import EmailField, StringField, SubmitField, TextAreaField
-from wtforms.validators import DataRequired, Email, Length
+from wtforms import (
+    DateField,
+    EmailField,
+    IntegerField,
+    SelectField,
+    StringField,
+    SubmitField,
+    TextAreaField,
+)
+from wtforms.validators import (
+    DataRequired,
+    Email,
+    Length,
+    NumberRange,
+    Optional,
+    ValidationError,
+)
+
+
+def single_line(form, field):
+    """Reject line breaks in values that end up in mail headers"""
+    if field.data and ("\r" in field.data or "\n" in field.data):
+        raise ValidationError("Kan ikke inneholde linjeskift")
 
 
 class ContactForm(FlaskForm):
@@ -42,3 +63,54 @@ class ContactForm(FlaskForm):
     )
 
     submit = SubmitField("Send melding")
+
+
+class CateringInquiryForm(FlaskForm):
+    # The catering page is cached and pre-rendered for anonymous visitors, so
+    # it cannot carry a per-session CSRF token. The form changes no state
+    # beyond storing the inquiry, and routes.catering limits how often one
+    # IP may send it.
+    class Meta:
+        csrf = False
+
+    name = StringField(
+        "Navn",
+        validators=[
+            DataRequired(message="Navn er påkrevd"),
+            Length(min=2, max=100, message="Navn må være mellom 2 og 100 tegn"),
+            single_line,
+        ],
+    )
+
+    email = EmailField(
+        "E-post",
+        validators=[
+            DataRequired(message="E-post er påkrevd"),
+            Email(message="Ugyldig e-postadresse"),
+            single_line,
+        ],
+    )
+
+    phone = StringField(
+        "Telefon",
+        validators=[Length(max=20, message="Telefonnummer kan ikke overstige 20 tegn")],
+    )
+
+    event_date = DateField("Dato for arrangementet", validators=[Optional()])
+
+    persons = IntegerField(
+        "Antall personer",
+        validators=[
+            Optional(),
+            NumberRange(min=1, max=2000, message="Ugyldig antall personer"),
+        ],
+    )
+
+    package_name = SelectField("Pakke", choices=[], default="")
+
+    message = TextAreaField(
+        "Melding",
+        validators=[Length(max=2000, message="Melding kan ikke overstige 2000 tegn")],
+    )
+
+    submit = SubmitField("Send forespørsel")
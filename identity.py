@@ -0,0 +1,80 @@
+"""Cached identities for logged-in admins.
+
+Flask-Login calls the user loader on every request that carries a session.
+Instead of a ``User`` row it gets a small immutable ``Identity`` (id,
+username, is_admin), kept per app for ``IDENTITY_CACHE_TTL`` seconds.
+Committed changes to a ``User`` drop its entry in this app at once;
+other workers pick the change up when the TTL runs out.
+"""
+
+import threading
+import time
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from models import User
+
+_cache_lock = threading.Lock()
+
+
+class Identity(UserMixin):
+    """The parts of a User the admin pages need, detached from any session"""
+
+    def __init__(self, id, username, is_admin):
+        self.id = id
+        self.username = username
+        self.is_admin = bool(is_admin)
+
+    def __repr__(self):
+        return f"<Identity {self.id} {self.username!r}>"
+
+
+def _cache():
+    return current_app.extensions.setdefault("identity_cache", {})
+
+
+def load_identity(user_id):
+    """Identity for a user id, or None if the user does not exist"""
+    now = time.monotonic()
+    cache = _cache()
+    with _cache_lock:
+        cached = cache.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    identity = Identity(user.id, user.username, user.is_admin)
+    with _cache_lock:
+        cache[user_id] = (identity, now + current_app.config["IDENTITY_CACHE_TTL"])
+    return identity
+
+
+def forget_identity(user_id):
+    if not has_app_context():
+        return
+    cache = _cache()
+    with _cache_lock:
+        cache.pop(user_id, None)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    object_session(target).info.setdefault("changed_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_changed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        forget_identity(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_users", None)
@@ -0,0 +1,196 @@
+"""Keep admin logins from eating the workers that serve the public pages.
+
+Checking a password is deliberately slow, so two limits apply before and
+around it:
+
+- Token buckets per client IP and per username. Every attempt takes a token
+  from both before the hash is checked; an empty bucket rejects the attempt
+  straight away. Buckets refill at ``LOGIN_*_PER_MINUTE`` up to
+  ``LOGIN_*_BURST``, and a successful login refills the username's bucket.
+  ``LOGIN_THROTTLE_STORE=db`` keeps the buckets in the ``login_buckets``
+  table so all workers share them; the default keeps them per app.
+  ``take_attempt`` offers the same buckets to other public forms.
+- Hashes run on a pool of ``LOGIN_HASH_WORKERS`` threads with room for
+  ``LOGIN_HASH_QUEUE`` waiting attempts. Beyond that ``verify_password``
+  raises ``HashingBusy`` instead of queueing more work.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import check_password_hash
+
+from app import db
+from models import LoginBucket
+
+# In-memory buckets kept at most; the least recently used are forgotten
+MAX_MEMORY_BUCKETS = 10000
+# Database buckets unused this long are deleted (they would be full again)
+STALE_BUCKET_SECONDS = 3600
+
+
+class HashingBusy(Exception):
+    """Too many password checks are running or waiting"""
+
+
+def _refill(tokens, checked_at, now, burst, per_minute):
+    return min(burst, tokens + (now - checked_at) * per_minute / 60)
+
+
+def _wait_for_token(tokens, per_minute):
+    return (1 - tokens) * 60 / per_minute if per_minute > 0 else float("inf")
+
+
+class MemoryBuckets:
+    """Token buckets in memory, bounded by MAX_MEMORY_BUCKETS"""
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, per_minute):
+        """Take a token; seconds until one is available if the bucket is empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, checked_at = self._buckets.pop(key, (burst, now))
+            tokens = _refill(tokens, checked_at, now, burst, per_minute)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = _wait_for_token(tokens, per_minute)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > MAX_MEMORY_BUCKETS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+class DatabaseBuckets:
+    """Token buckets in the login_buckets table, shared by all workers"""
+
+    def take(self, key, burst, per_minute):
+        now = time.time()
+        bucket = db.session.get(LoginBucket, key, with_for_update=True)
+        if bucket is None:
+            db.session.execute(
+                delete(LoginBucket).where(
+                    LoginBucket.checked_at < now - STALE_BUCKET_SECONDS
+                )
+            )
+            bucket = LoginBucket(key=key, tokens=burst, checked_at=now)
+            db.session.add(bucket)
+            try:
+                db.session.flush()
+            except IntegrityError:
+                # Another worker created the bucket first; lock and use theirs
+                db.session.rollback()
+                bucket = db.session.get(LoginBucket, key, with_for_update=True)
+        tokens = _refill(bucket.tokens, bucket.checked_at, now, burst, per_minute)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = _wait_for_token(tokens, per_minute)
+        bucket.tokens, bucket.checked_at = tokens, now
+        db.session.commit()
+        return wait
+
+    def reset(self, key):
+        db.session.execute(delete(LoginBucket).where(LoginBucket.key == key))
+        db.session.commit()
+
+
+STORES = {"memory": MemoryBuckets, "db": DatabaseBuckets}
+_app_state_lock = threading.Lock()
+
+
+def _store():
+    """The current app's bucket store, created on first use"""
+    store = current_app.extensions.get("login_buckets")
+    if store is None:
+        with _app_state_lock:
+            store = current_app.extensions.get("login_buckets")
+            if store is None:
+                store = STORES[current_app.config["LOGIN_THROTTLE_STORE"]]()
+                current_app.extensions["login_buckets"] = store
+    return store
+
+
+def take_attempt(key, burst, per_minute):
+    """Charge one attempt to key's bucket; 0 or the seconds until allowed"""
+    return _store().take(key, burst, per_minute)
+
+
+def _user_key(username):
+    return "user:" + (username or "").strip().lower()
+
+
+def throttle_login(ip, username):
+    """Charge an attempt to the IP and the username.
+
+    Returns 0 if the password may be checked, otherwise the seconds to wait.
+    """
+    config = current_app.config
+    store = _store()
+    waits = [
+        store.take(
+            "ip:" + (ip or "unknown"),
+            config["LOGIN_IP_BURST"],
+            config["LOGIN_IP_PER_MINUTE"],
+        ),
+        store.take(
+            _user_key(username),
+            config["LOGIN_USER_BURST"],
+            config["LOGIN_USER_PER_MINUTE"],
+        ),
+    ]
+    return max(waits)
+
+
+def forgive_login(username):
+    """Refill the username's bucket after a successful login"""
+    _store().reset(_user_key(username))
+
+
+def _get_executor():
+    """The current app's hashing pool and its slots, created on first use"""
+    pool = current_app.extensions.get("login_hash_pool")
+    if pool is None:
+        with _app_state_lock:
+            pool = current_app.extensions.get("login_hash_pool")
+            if pool is None:
+                workers = current_app.config["LOGIN_HASH_WORKERS"]
+                pool = (
+                    ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix="login-hash"
+                    ),
+                    threading.BoundedSemaphore(
+                        workers + current_app.config["LOGIN_HASH_QUEUE"]
+                    ),
+                )
+                current_app.extensions["login_hash_pool"] = pool
+    return pool
+
+
+def verify_password(user, password):
+    """User.check_password on the hashing pool; raises HashingBusy"""
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        # Read the hash here: the pool's threads have no app context or session
+        future = executor.submit(check_password_hash, user.password_hash, password)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _future: slots.release())
+    return future.result()
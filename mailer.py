@@ -0,0 +1,158 @@
+"""Background delivery of catering inquiry notifications.
+
+Requests only insert the inquiry and hand its id to a small thread pool; the
+outbound call to the mail provider, including retries with exponential
+backoff, happens on the pool's threads.
+
+``MAIL_TRANSPORT`` selects how mail is sent:
+
+- ``sendgrid``: SendGrid API (needs ``SENDGRID_API_KEY``)
+- ``file``: write ``.eml`` files to ``MAIL_FILE_DIR``, for testing offline
+- ``log``: only log the message (default when no API key is configured)
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import make_msgid
+
+from flask import current_app
+
+from app import db
+from models import CateringInquiry
+from settings import get_settings
+
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """The current app's delivery pool, created on first use"""
+    executor = current_app.extensions.get("mailer")
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get("mailer")
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=current_app.config["MAIL_WORKERS"],
+                    thread_name_prefix="mailer",
+                )
+                current_app.extensions["mailer"] = executor
+    return executor
+
+
+def build_message(inquiry, to_address):
+    message = EmailMessage()
+    message["Subject"] = f"Catering-forespørsel fra {inquiry.name}"
+    message["From"] = current_app.config["MAIL_FROM"]
+    message["To"] = to_address
+    message["Reply-To"] = inquiry.email
+    message["Message-ID"] = make_msgid(domain="nawaratthaimat.no")
+
+    lines = [
+        f"Navn: {inquiry.name}",
+        f"E-post: {inquiry.email}",
+        f"Telefon: {inquiry.phone or '-'}",
+        f"Dato: {inquiry.event_date or '-'}",
+        f"Antall personer: {inquiry.persons or '-'}",
+        f"Pakke: {inquiry.package_name or '-'}",
+        "",
+        inquiry.message or "",
+    ]
+    message.set_content("\n".join(lines))
+    return message
+
+
+def send_with_sendgrid(message):
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail, ReplyTo
+
+    mail = Mail(
+        from_email=message["From"],
+        to_emails=message["To"],
+        subject=message["Subject"],
+        plain_text_content=message.get_content(),
+    )
+    mail.reply_to = ReplyTo(message["Reply-To"])
+    response = SendGridAPIClient(current_app.config["SENDGRID_API_KEY"]).send(mail)
+    if response.status_code >= 300:
+        raise RuntimeError(f"SendGrid responded with {response.status_code}")
+
+
+def write_to_file(message):
+    directory = current_app.config["MAIL_FILE_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    filename = datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f") + ".eml"
+    with open(os.path.join(directory, filename), "wb") as f:
+        f.write(bytes(message))
+
+
+def write_to_log(message):
+    logging.info("Mail to %s: %s", message["To"], message["Subject"])
+
+
+TRANSPORTS = {
+    "sendgrid": send_with_sendgrid,
+    "file": write_to_file,
+    "log": write_to_log,
+}
+
+
+def deliver_inquiry(app, inquiry_id):
+    """Send the notification for one inquiry, retrying with backoff"""
+    with app.app_context():
+        inquiry = db.session.get(CateringInquiry, inquiry_id)
+        if inquiry is None or inquiry.status == "sent":
+            return
+
+        transport = TRANSPORTS[app.config["MAIL_TRANSPORT"]]
+        to_address = app.config["MAIL_TO"] or get_settings()["email"]
+        max_attempts = app.config["MAIL_MAX_ATTEMPTS"]
+
+        while inquiry.attempts < max_attempts:
+            inquiry.attempts += 1
+            try:
+                # Inside the try: a message that can't be built is a failed
+                # attempt with its error recorded, like a failed send
+                transport(build_message(inquiry, to_address))
+            except Exception as exc:
+                logging.warning(
+                    "Delivery of inquiry %s failed (attempt %s/%s): %s",
+                    inquiry.id,
+                    inquiry.attempts,
+                    max_attempts,
+                    exc,
+                )
+                inquiry.last_error = str(exc)
+                db.session.commit()
+                if inquiry.attempts < max_attempts:
+                    delay = app.config["MAIL_RETRY_DELAY"] * 2 ** (inquiry.attempts - 1)
+                    time.sleep(delay * random.uniform(0.8, 1.2))
+                continue
+
+            inquiry.status = "sent"
+            inquiry.sent_at = datetime.utcnow()
+            inquiry.last_error = None
+            db.session.commit()
+            return
+
+        inquiry.status = "failed"
+        db.session.commit()
+        logging.error("Giving up on inquiry %s after %s attempts", inquiry.id, max_attempts)
+
+
+def _log_unexpected_error(future):
+    if future.exception() is not None:
+        logging.error("Inquiry delivery crashed", exc_info=future.exception())
+
+
+def queue_inquiry_notification(inquiry_id):
+    """Hand an inquiry to the background pool; returns immediately"""
+    app = current_app._get_current_object()
+    future = _get_executor().submit(deliver_inquiry, app, inquiry_id)
+    future.add_done_callback(_log_unexpected_error)
+    return future
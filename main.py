@@ -1 +1,8 @@
-from app import app  # noqa: F401
+import logging
+import os
+
+from app import create_app
+
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+
+app = create_app()
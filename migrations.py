@@ -0,0 +1,253 @@
+"""Schema upgrades for databases created before a model gained a column.
+
+``db.create_all()`` only creates missing tables, so columns added to existing
+models are listed here and added with ``ALTER TABLE``, and indexes declared
+on existing tables are created if the database lacks them. Every step is
+idempotent and safe to run on each deploy.
+"""
+
+import logging
+
+from sqlalchemy import inspect, select, text, update
+
+from allergens import ALLERGENS, bit, parse_mask
+from app import db
+from catering import WITH_CONTENTS_IN, relink_packages
+from models import Allergen, CateringPackage, MenuItem, RestaurantInfo
+from prices import parse_price
+
+# Columns added to existing tables, in the order they were introduced
+ADDED_COLUMNS = [
+    MenuItem.__table__.c.clean_description,
+    MenuItem.__table__.c.allergens,
+    MenuItem.__table__.c.allergen_mask,
+    CateringPackage.__table__.c.allergen_mask,
+    MenuItem.__table__.c.price_ore,
+    CateringPackage.__table__.c.price_per_person_ore,
+    MenuItem.__table__.c.subcategory,
+]
+
+BATCH_SIZE = 500
+
+# Drinks the menu page used to sort into sections by name
+DRINK_SUBCATEGORIES = {
+    "ol": [
+        "Singha",
+        "Chang",
+        "Ringnes tapp",
+        "Poretti",
+        "Blanc 1864",
+        "Corona",
+        "Breezer",
+        "Smirnoff ice",
+        "Carlsberg",
+        "Ringnes",
+    ],
+    "vin": ["Hvitvin", "Rødvin"],
+    "cocktails": [
+        "Gin and tonic",
+        "Vodka og battery",
+        "Irish coffee",
+        "Baileys og kaffe",
+    ],
+    "brennevin": ["Whisky", "Gammel Oppland"],
+}
+
+# Tables whose indexes were added after the table itself
+INDEXED_TABLES = [
+    MenuItem.__table__,
+    CateringPackage.__table__,
+    RestaurantInfo.__table__,
+]
+
+
+def add_missing_columns():
+    """Add model columns that are missing from existing tables"""
+    inspector = inspect(db.engine)
+    existing = {}
+    added = []
+
+    with db.engine.begin() as connection:
+        for column in ADDED_COLUMNS:
+            table = column.table.name
+            if table not in existing:
+                existing[table] = {c["name"] for c in inspector.get_columns(table)}
+            if column.name in existing[table]:
+                continue
+
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            definition = f"{column.name} {column_type}"
+            if column.server_default is not None:
+                definition += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                definition += " NOT NULL"
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {definition}"))
+            existing[table].add(column.name)
+            added.append(f"{table}.{column.name}")
+
+    for name in added:
+        logging.info("Added column %s", name)
+    return added
+
+
+def add_missing_indexes():
+    """Create model indexes that are missing from existing tables"""
+    inspector = inspect(db.engine)
+    added = []
+
+    with db.engine.begin() as connection:
+        for table in INDEXED_TABLES:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(connection)
+                    added.append(index.name)
+
+    for name in added:
+        logging.info("Created index %s", name)
+    return added
+
+
+def fill_missing_sort_order():
+    """Keyset pagination in the admin lists cannot page over NULL sort keys"""
+    count = 0
+    for model in (MenuItem, CateringPackage):
+        result = db.session.execute(
+            update(model).where(model.sort_order.is_(None)).values(sort_order=0)
+        )
+        count += result.rowcount
+    db.session.commit()
+    return count
+
+
+def backfill_allergens(only_missing=True):
+    """Parse stored descriptions into clean_description and allergens"""
+    query = MenuItem.query
+    if only_missing:
+        query = query.filter(MenuItem.clean_description.is_(None))
+
+    count = 0
+    for item in query.all():
+        item.set_description(item.description)
+        count += 1
+
+    db.session.commit()
+    return count
+
+
+def seed_allergens():
+    """Make the allergens code table match ALLERGENS"""
+    current = {row.number: row for row in db.session.scalars(select(Allergen))}
+    for number, (name, description) in ALLERGENS.items():
+        row = current.get(number)
+        if row is None:
+            db.session.add(
+                Allergen(
+                    number=number, bit=bit(number), name=name, description=description
+                )
+            )
+        else:
+            row.bit, row.name, row.description = bit(number), name, description
+    db.session.commit()
+
+
+def backfill_allergen_masks():
+    """Fill allergen_mask from the allergens text where it is still 0.
+
+    ``updated_at`` is written back unchanged: the content did not change,
+    so cached pages and their validators stay valid.
+    """
+    count = 0
+    for model in (MenuItem, CateringPackage):
+        rows = db.session.execute(
+            select(model.id, model.allergens, model.updated_at).where(
+                model.allergen_mask == 0,
+                model.allergens.is_not(None),
+                model.allergens != "",
+            )
+        ).all()
+        values = [
+            {"id": row.id, "allergen_mask": mask, "updated_at": row.updated_at}
+            for row in rows
+            if (mask := parse_mask(row.allergens))
+        ]
+        for start in range(0, len(values), BATCH_SIZE):
+            db.session.execute(update(model), values[start : start + BATCH_SIZE])
+        count += len(values)
+    db.session.commit()
+    return count
+
+
+def backfill_prices():
+    """Parse the price text of rows that have no price in øre yet"""
+    count = 0
+    for model, text_column, ore_column in (
+        (MenuItem, MenuItem.price, MenuItem.price_ore),
+        (
+            CateringPackage,
+            CateringPackage.price_per_person,
+            CateringPackage.price_per_person_ore,
+        ),
+    ):
+        rows = db.session.execute(
+            select(model.id, text_column, model.updated_at).where(ore_column.is_(None))
+        ).all()
+        values = []
+        for id, price, updated_at in rows:
+            ore = parse_price(price)
+            if ore is None:
+                logging.warning("No price in %s %s: %r", model.__tablename__, id, price)
+                continue
+            values.append({"id": id, ore_column.key: ore, "updated_at": updated_at})
+        for start in range(0, len(values), BATCH_SIZE):
+            db.session.execute(update(model), values[start : start + BATCH_SIZE])
+        count += len(values)
+    db.session.commit()
+    return count
+
+
+def fill_drink_subcategories():
+    """Give the drinks listed in DRINK_SUBCATEGORIES their menu section"""
+    count = 0
+    for subcategory, names in DRINK_SUBCATEGORIES.items():
+        result = db.session.execute(
+            update(MenuItem)
+            .where(
+                MenuItem.category == "alkohol",
+                MenuItem.subcategory.is_(None),
+                MenuItem.name.in_(names),
+            )
+            .values(subcategory=subcategory, updated_at=MenuItem.updated_at)
+        )
+        count += result.rowcount
+    db.session.commit()
+    return count
+
+
+def backfill_package_contents():
+    """Turn the dish lists of packages without content rows into rows"""
+    packages = [
+        package
+        for package in db.session.scalars(
+            select(CateringPackage).options(WITH_CONTENTS_IN)
+        )
+        if not package.contents and package.items
+    ]
+    relink_packages(packages)
+    db.session.commit()
+    return len(packages)
+
+
+def upgrade():
+    """Bring the database schema and derived data up to date"""
+    # Primary only: replicas get the schema through replication
+    db.create_all(bind_key=None)
+    add_missing_columns()
+    add_missing_indexes()
+    fill_missing_sort_order()
+    backfill_allergens()
+    seed_allergens()
+    backfill_allergen_masks()
+    backfill_prices()
+    fill_drink_subcategories()
+    backfill_package_contents()
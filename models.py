@@ -3,7 +3,10 @@ from datetime import datetime
 from flask_login import UserMixin
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from allergens import parse_mask
 from app import db
+from prices import parse_price
+from utils.text import clean_description_and_extract_allergens, split_dish_number
 
 
 class User(UserMixin, db.Model):
@@ -22,15 +25,44 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
 
+# Index predicate for "is_active = true", spelled the way each dialect
+# compares booleans so the planners can match it against the queries
+ACTIVE_ONLY = {
+    "postgresql_where": db.text("is_active"),
+    "sqlite_where": db.text("is_active = 1"),
+}
+
+
 class MenuItem(db.Model):
     __tablename__ = "menu_items"
+    __table_args__ = (
+        # Admin list: every item in menu order
+        db.Index("ix_menu_items_category_order", "category", "sort_order", "name"),
+        # Public menu: active items in menu order
+        db.Index(
+            "ix_menu_items_active_category_order",
+            "category",
+            "sort_order",
+            "name",
+            **ACTIVE_ONLY,
+        ),
+        # Newest change, for the page validators
+        db.Index("ix_menu_items_updated_at", "updated_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.String(10), nullable=False)
+    clean_description = db.Column(db.Text)  # Description without allergen info
+    allergens = db.Column(db.String(100))  # Comma-separated allergen numbers
+    allergen_mask = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )  # Same allergens as bits, see allergens.py
+    price = db.Column(db.String(10), nullable=False)  # As typed, e.g. "195"
+    price_ore = db.Column(db.Integer)  # The price in øre, see prices.py
     category = db.Column(
         db.String(50), nullable=False
     )  # 'hovedretter', 'ekstra', 'drikker', 'catering'
+    subcategory = db.Column(db.String(50))  # 'ol', 'vin', ... (MENU_SUBCATEGORIES)
     image_filename = db.Column(db.String(100))
     is_active = db.Column(db.Boolean, default=True)
     sort_order = db.Column(db.Integer, default=0)
@@ -39,16 +71,43 @@ class MenuItem(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    # Catering package lines showing this dish
+    package_entries = db.relationship(
+        "CateringPackageItem", back_populates="menu_item"
+    )
+
+    def set_description(self, description):
+        """Store the description and the allergen info parsed out of it"""
+        self.description = description
+        self.clean_description, self.allergens = (
+            clean_description_and_extract_allergens(description)
+        )
+        self.allergen_mask = parse_mask(self.allergens)
+
+    def set_price(self, price):
+        self.price = price
+        self.price_ore = parse_price(price)
+
 
 class CateringPackage(db.Model):
     __tablename__ = "catering_packages"
+    __table_args__ = (
+        db.Index(
+            "ix_catering_packages_active_order", "sort_order", "name", **ACTIVE_ONLY
+        ),
+        db.Index("ix_catering_packages_updated_at", "updated_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    price_per_person = db.Column(db.String(20), nullable=False)
+    price_per_person = db.Column(db.String(20), nullable=False)  # "385 kr/pers"
+    price_per_person_ore = db.Column(db.Integer)  # The price in øre
     description = db.Column(db.Text)
-    items = db.Column(db.Text)  # Store as JSON string
+    items = db.Column(db.Text)  # One dish per line, as typed; see contents
     min_persons = db.Column(db.Integer, default=10)
     allergens = db.Column(db.String(200))  # Comma-separated allergen numbers
+    allergen_mask = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )  # Same allergens as bits, see allergens.py
     best_for = db.Column(db.String(200))  # Best for what occasions
     is_active = db.Column(db.Boolean, default=True)
     sort_order = db.Column(db.Integer, default=0)
@@ -57,12 +116,127 @@ class CateringPackage(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    contents = db.relationship(
+        "CateringPackageItem",
+        back_populates="package",
+        order_by="CateringPackageItem.position",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    @property
+    def contents_updated_at(self):
+        """Newest change to the package or a dish it links to"""
+        stamps = [self.updated_at] + [
+            entry.menu_item.updated_at
+            for entry in self.contents
+            if entry.menu_item is not None
+        ]
+        return max(filter(None, stamps), default=None)
+
+    @property
+    def effective_allergen_mask(self):
+        """The package's own allergens plus those of the dishes it links to"""
+        mask = self.allergen_mask or 0
+        for entry in self.contents:
+            if entry.menu_item is not None:
+                mask |= entry.menu_item.allergen_mask or 0
+        return mask
+
+    def set_price_per_person(self, price_per_person):
+        self.price_per_person = price_per_person
+        self.price_per_person_ore = parse_price(price_per_person)
+
+    def set_allergens(self, allergens):
+        """Store the allergen numbers as typed and as a bitmask"""
+        self.allergens = allergens
+        self.allergen_mask = parse_mask(allergens)
+
+
+class CateringPackageItem(db.Model):
+    """One dish in a catering package, linked to a menu item when one matches"""
+
+    __tablename__ = "catering_package_items"
+    __table_args__ = (
+        db.Index("ix_catering_package_items_package", "package_id", "position"),
+        db.Index("ix_catering_package_items_menu_item", "menu_item_id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    package_id = db.Column(
+        db.Integer,
+        db.ForeignKey("catering_packages.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    position = db.Column(db.Integer, nullable=False)
+    menu_item_id = db.Column(
+        db.Integer, db.ForeignKey("menu_items.id", ondelete="SET NULL")
+    )
+    name = db.Column(db.String(200), nullable=False)  # The line as typed
+
+    package = db.relationship("CateringPackage", back_populates="contents")
+    menu_item = db.relationship("MenuItem", back_populates="package_entries")
+
+    @property
+    def display_name(self):
+        """The linked dish's current name (without menu number), else the line"""
+        if self.menu_item is None:
+            return self.name
+        return split_dish_number(self.menu_item.name)[1]
+
+
+class Allergen(db.Model):
+    """Code table for the allergen numbers, so SQL can decode the bitmasks"""
+
+    __tablename__ = "allergens"
+    number = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bit = db.Column(db.Integer, nullable=False)  # 1 << (number - 1)
+    name = db.Column(db.String(50), nullable=False)
+    description = db.Column(db.String(200), nullable=False)
+
 
 class RestaurantInfo(db.Model):
     __tablename__ = "restaurant_info"
+    __table_args__ = (db.Index("ix_restaurant_info_updated_at", "updated_at"),)
     id = db.Column(db.Integer, primary_key=True)
     key = db.Column(db.String(50), unique=True, nullable=False)
     value = db.Column(db.Text, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+
+
+class ContentVersion(db.Model):
+    __tablename__ = "content_versions"
+    name = db.Column(db.String(50), primary_key=True)  # 'menu', 'catering', ...
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class CateringInquiry(db.Model):
+    __tablename__ = "catering_inquiries"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(20))
+    event_date = db.Column(db.Date)
+    persons = db.Column(db.Integer)
+    package_name = db.Column(db.String(100))
+    message = db.Column(db.Text)
+    status = db.Column(
+        db.String(20), nullable=False, default="pending"
+    )  # 'pending', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+
+class LoginBucket(db.Model):
+    """Login attempts left for one IP or username (LOGIN_THROTTLE_STORE=db)"""
+
+    __tablename__ = "login_buckets"
+    key = db.Column(db.String(200), primary_key=True)  # 'ip:1.2.3.4', 'user:ola'
+    tokens = db.Column(db.Float, nullable=False)
+    checked_at = db.Column(db.Float, nullable=False, index=True)  # Unix time
@@ -0,0 +1,31 @@
+"""Prices as whole øre (1 kr = 100 øre), parsed from and formatted as NOK.
+
+Menu items and catering packages keep the price text the admin typed
+("195", "385 kr/pers") next to an integer ``*_ore`` column, which is what
+sorting, sums and quotes use.
+"""
+
+import re
+
+# "1 299,50", "1.299", "385 kr/pers", "kr 195,-"
+PRICE = re.compile(r"(\d{1,3}(?:[ .\u00a0]\d{3})+|\d+)(?:[,.](\d{1,2}))?(?!\d)")
+
+
+def parse_price(text):
+    """Øre for the first amount in text, or None if there is none"""
+    match = PRICE.search(text or "")
+    if match is None:
+        return None
+    kroner = int(re.sub(r"\D", "", match.group(1)))
+    decimals = (match.group(2) or "0").ljust(2, "0")
+    return kroner * 100 + int(decimals)
+
+
+def format_price(ore):
+    """38500 -> '385', 129950 -> '1 299,50' (with a no-break space)"""
+    if ore is None:
+        return ""
+    kroner, rest = divmod(ore, 100)
+    text = f"{kroner:,}".replace(",", "\u00a0")
+    return f"{text},{rest:02d}" if rest else text
+
@@ -1,11 +1,148 @@
-from flask import flash, render_template, request
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from functools import wraps
 
-from app import app
-from models import CateringPackage, MenuItem, RestaurantInfo
-from utils.text import clean_description_and_extract_allergens
+from flask import (
+    Blueprint,
+    current_app,
+    flash,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
+from sqlalchemy import case, exists, func, select
+from werkzeug.http import is_resource_modified
+from werkzeug.local import LocalProxy
 
+from admin_forms import MENU_SUBCATEGORIES
+from allergens import free_of, numbers_in, parse_mask
+from app import db
+from catering import WITH_CONTENTS, active_packages
+from content import (
+    CATERING,
+    MENU,
+    SETTINGS,
+    VersionedSnapshot,
+    content_timestamp,
+    current_version,
+)
+from forms import CateringInquiryForm
+from login_guard import take_attempt
+from mailer import queue_inquiry_notification
+from models import (
+    CateringInquiry,
+    CateringPackage,
+    CateringPackageItem,
+    MenuItem,
+    RestaurantInfo,
+)
+from prices import format_price, parse_price
+from search import menu_index
+from settings import get_settings
+from utils import database
+from utils.images import image_url, responsive_image
+from utils.images import load_manifest as load_image_manifest
 
-@app.route("/")
+public_bp = Blueprint("public", __name__)
+
+# Same upper limit as the inquiry form's headcount
+MAX_QUOTE_PERSONS = 2000
+
+
+@public_bp.app_context_processor
+def inject_settings():
+    """Expose restaurant settings to templates, loaded only when used"""
+    return {"site": LocalProxy(get_settings)}
+
+
+@public_bp.before_request
+def read_from_replica():
+    """Public pages only read, so they can use the replica when there is one"""
+    database.prefer_replica()
+
+
+public_bp.add_app_template_global(responsive_image)
+public_bp.add_app_template_global(image_url)
+
+
+def template_version():
+    """Digest of what the HTML is built from besides content: the deploy
+    version or the template files, plus the static asset and image manifests,
+    whose hashed URLs the pages link to. Computed once per app."""
+    version = current_app.extensions.get("template_version")
+    if version is not None:
+        return version
+
+    digest = hashlib.sha1()
+    if current_app.config.get("DEPLOY_VERSION"):
+        digest.update(current_app.config["DEPLOY_VERSION"].encode())
+    else:
+        template_dir = os.path.join(current_app.root_path, current_app.template_folder)
+        for root, _dirs, files in sorted(os.walk(template_dir)):
+            for filename in sorted(files):
+                stat = os.stat(os.path.join(root, filename))
+                digest.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    digest.update(current_app.extensions["asset_manifest"].digest().encode())
+    images = load_image_manifest(current_app.static_folder)
+    digest.update(json.dumps(images, sort_keys=True).encode())
+
+    version = digest.hexdigest()[:12]
+    current_app.extensions["template_version"] = version
+    return version
+
+
+def conditional_page(models, versions=()):
+    """Answer conditional GETs with 304 before rendering the page.
+
+    The validator is built from the newest ``updated_at`` of the content the
+    page shows plus the template/deploy version. Every page extends
+    base.html, whose footer shows the restaurant settings, so the SETTINGS
+    version is always part of it. Requests carrying a session (flash
+    messages, logged-in admins) are personalised and always rendered.
+    """
+    versions = (*versions, SETTINGS)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != "GET" or session:
+                return f(*args, **kwargs)
+
+            last_modified, version_sum = content_timestamp(models, versions)
+            last_modified = last_modified or datetime(2025, 1, 1)
+            etag = hashlib.sha1(
+                f"{template_version()}:{last_modified.isoformat()}:{version_sum}".encode()
+            ).hexdigest()[:20]
+
+            if is_resource_modified(
+                request.environ, etag=etag, last_modified=last_modified
+            ):
+                response = make_response(f(*args, **kwargs))
+            else:
+                response = current_app.response_class(status=304)
+
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config["PAGE_CACHE_MAX_AGE"]
+            response.cache_control.must_revalidate = True
+            response.vary.add("Cookie")
+            return response
+
+        return decorated_function
+
+    return decorator
+
+
+@public_bp.route("/")
+@conditional_page([RestaurantInfo])
 def index():
     """Homepage with business introduction"""
     # Featured dishes to showcase on homepage
@@ -21,9 +158,8 @@ def index():
     return render_template("index.html", featured_dishes=featured_dishes)
 
 
-@app.route("/meny")
-def menu():
-    """Menu page displaying food and beverage offerings"""
+def build_menu_data():
+    """Group active menu items by category for the menu page"""
 
     # Get menu items from database, fallback to static data if empty
     db_items = (
@@ -48,16 +184,22 @@ def menu():
 
         for item in db_items:
             if item.category in menu_data:
-                clean_desc, allergens = clean_description_and_extract_allergens(
-                    item.description
-                )
+                # Allergens are parsed out of the description when it is saved
                 menu_data[item.category].append(
                     {
+                        "id": item.id,
+                        "updated_at": item.updated_at,
                         "name": item.name,
-                        "price": item.price,
-                        "description": clean_desc,
-                        "allergens": allergens or getattr(item, "allergens", ""),
+                        "price": (
+                            format_price(item.price_ore)
+                            if item.price_ore is not None
+                            else item.price
+                        ),
+                        "price_ore": item.price_ore,
+                        "description": item.clean_description or "",
+                        "allergens": item.allergens or "",
                         "image": item.image_filename,
+                        "subcategory": item.subcategory,
                     }
                 )
     else:
@@ -269,45 +411,311 @@ def menu():
             ],
             "alkohol": [],  # Now loaded from database,
         }
+        for items in menu_data.values():
+            for item in items:
+                item["price_ore"] = parse_price(item["price"])
 
-    return render_template("menu.html", menu=menu_data)
+    return menu_data
 
 
-@app.route("/catering", methods=["GET", "POST"])
-def catering():
-    """Catering page with detailed catering packages"""
-    # Get all active catering packages from database
+def group_subsections(items):
+    """Split a category's items into its sections, in one pass.
+
+    Sections follow MENU_SUBCATEGORIES; items without a known subcategory
+    come last under "Annet" so nothing added in the admin goes missing.
+    """
+    sections = {key: [] for key, _title in MENU_SUBCATEGORIES}
+    other = []
+    for item in items:
+        sections.get(item.get("subcategory"), other).append(item)
+
+    grouped = [
+        {"key": key, "title": title, "items": sections[key]}
+        for key, title in MENU_SUBCATEGORIES
+        if sections[key]
+    ]
+    if other:
+        grouped.append({"key": None, "title": "Annet", "items": other})
+    return grouped
+
+
+menu_snapshot = VersionedSnapshot(MENU, build_menu_data)
+drink_sections = VersionedSnapshot(
+    MENU, lambda: group_subsections(menu_snapshot.get()["alkohol"])
+)
+
+
+@public_bp.route("/meny")
+@conditional_page([MenuItem], versions=[MENU])
+def menu():
+    """Menu page displaying food and beverage offerings"""
+    return render_template(
+        "menu.html", menu=menu_snapshot.get(), drink_sections=drink_sections.get()
+    )
+
+
+def json_payload(data):
+    """Serialized JSON bytes plus their ETag, computed once per build"""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    return body, hashlib.sha1(body).hexdigest()[:20]
+
+
+def cached_json(payloads, key):
+    """Serve one pre-serialized payload, answering If-None-Match with 304"""
+    if key not in payloads:
+        return jsonify({"error": f"Ukjent kategori: {key}"}), 404
+    body, etag = payloads[key]
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["PAGE_CACHE_MAX_AGE"]
+    response.cache_control.must_revalidate = True
+    return response.make_conditional(request)
+
+
+def build_menu_payloads():
+    """The menu as JSON, whole (key None) and per category"""
+    categories = {
+        category: [
+            {
+                "name": item["name"],
+                "price": item["price"],
+                "price_ore": item["price_ore"],
+                "description": item["description"],
+                "allergens": numbers_in(parse_mask(item.get("allergens"))),
+                "subcategory": item.get("subcategory"),
+                "image": image_url(item["image"]) if item["image"] else None,
+            }
+            for item in items
+        ]
+        for category, items in menu_snapshot.get().items()
+    }
+    payloads = {
+        category: json_payload({"categories": {category: items}})
+        for category, items in categories.items()
+    }
+    payloads[None] = json_payload({"categories": categories})
+    return payloads
+
+
+def build_catering_payloads():
+    """Active catering packages as JSON, with the dishes as a list"""
+    packages = active_packages()
+    return {
+        None: json_payload(
+            {
+                "packages": [
+                    {
+                        "id": package.id,
+                        "name": package.name,
+                        "price_per_person": package.price_per_person,
+                        "price_per_person_ore": package.price_per_person_ore,
+                        "description": package.description or "",
+                        "items": [entry.display_name for entry in package.contents],
+                        "min_persons": package.min_persons,
+                        "allergens": numbers_in(package.effective_allergen_mask),
+                        "best_for": package.best_for or "",
+                    }
+                    for package in packages
+                ]
+            }
+        )
+    }
+
+
+menu_payloads = VersionedSnapshot(MENU, build_menu_payloads)
+catering_payloads = VersionedSnapshot(CATERING, build_catering_payloads)
+
+
+@public_bp.route("/api/menu")
+def menu_api():
+    """The grouped menu; ?category= limits it to one category"""
+    return cached_json(menu_payloads.get(), request.args.get("category") or None)
+
+
+@public_bp.route("/api/catering")
+def catering_api():
+    """Active catering packages"""
+    return cached_json(catering_payloads.get(), None)
+
+
+@public_bp.route("/api/menu/search")
+def menu_search():
+    """Menu items matching ?q=, leaving out those with any allergen in ?exclude="""
+    query = request.args.get("q", "")
+    exclude = parse_mask(request.args.get("exclude"))
+    limit = min(request.args.get("limit", 50, type=int), 200)
+
+    index = menu_index()
+    index.sync()
+    results = index.search(query, exclude, limit=max(limit, 1))
+    return jsonify(
+        {
+            "query": query,
+            "exclude": numbers_in(exclude),
+            "results": [
+                {
+                    "id": doc["id"],
+                    "name": doc["name"],
+                    "category": doc["category"],
+                    "price": doc["price"],
+                    "description": doc["description"],
+                    "allergens": numbers_in(doc["allergen_mask"]),
+                }
+                for doc in results
+            ],
+        }
+    )
+
+
+@public_bp.route("/api/catering/safe")
+def catering_safe():
+    """Active catering packages with none of the allergens in ?exclude=,
+    counting the dishes they link to"""
+    exclude = parse_mask(request.args.get("exclude"))
+    unsafe_dish = exists().where(
+        CateringPackageItem.package_id == CateringPackage.id,
+        CateringPackageItem.menu_item_id == MenuItem.id,
+        ~free_of(MenuItem.allergen_mask, exclude),
+    )
     packages = (
-        CateringPackage.query.filter_by(is_active=True)
-        .order_by(CateringPackage.sort_order)
+        db.session.scalars(
+            select(CateringPackage)
+            .where(
+                CateringPackage.is_active == True,  # noqa: E712 - IS 1 skips the index
+                free_of(CateringPackage.allergen_mask, exclude),
+                ~unsafe_dish,
+            )
+            .order_by(CateringPackage.sort_order, CateringPackage.name)
+            .options(WITH_CONTENTS)
+        )
+        .unique()
         .all()
     )
+    return jsonify(
+        {
+            "exclude": numbers_in(exclude),
+            "packages": [
+                {
+                    "id": package.id,
+                    "name": package.name,
+                    "min_persons": package.min_persons,
+                    "allergens": numbers_in(package.effective_allergen_mask),
+                }
+                for package in packages
+            ],
+        }
+    )
+
+
+@public_bp.route("/api/catering/quote")
+def catering_quote():
+    """Totals for ?persons= guests for every active package.
+
+    Each package is billed for at least its min_persons. All totals come
+    from one query; the catering page does the same sum in the browser.
+    """
+    persons = request.args.get("persons", type=int)
+    if persons is None or not 1 <= persons <= MAX_QUOTE_PERSONS:
+        return jsonify({"error": f"persons må være 1-{MAX_QUOTE_PERSONS}"}), 400
+
+    min_persons = func.coalesce(CateringPackage.min_persons, 1)
+    billed = case((min_persons > persons, min_persons), else_=persons)
+    rows = db.session.execute(
+        select(
+            CateringPackage.id,
+            CateringPackage.name,
+            CateringPackage.price_per_person_ore,
+            billed.label("billed"),
+            (CateringPackage.price_per_person_ore * billed).label("total_ore"),
+        )
+        .where(CateringPackage.is_active == True)  # noqa: E712 - IS 1 skips the index
+        .order_by(CateringPackage.sort_order, CateringPackage.name)
+    ).all()
+    return jsonify(
+        {
+            "persons": persons,
+            "packages": [
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "price_per_person_ore": row.price_per_person_ore,
+                    "billed_persons": row.billed,
+                    "total_ore": row.total_ore,
+                    "total": format_price(row.total_ore),
+                }
+                for row in rows
+            ],
+        }
+    )
+
+
+@public_bp.route("/catering", methods=["GET", "POST"])
+@conditional_page([CateringPackage, RestaurantInfo], versions=[CATERING])
+def catering():
+    """Catering page with detailed catering packages"""
+    # Active packages with their dishes, in one query
+    packages = active_packages()
 
     # Get restaurant info for contact details
-    phone = RestaurantInfo.query.filter_by(key="phone").first()
-    email = RestaurantInfo.query.filter_by(key="email").first()
+    settings = get_settings()
+    contact_info = {"phone": settings["phone"], "email": settings["email"]}
 
-    contact_info = {
-        "phone": phone.value if phone else "+47 61 17 77 71",
-        "email": email.value if email else "post@nawaratthaimat.no",
-    }
+    form = CateringInquiryForm()
+    form.package_name.choices = [("", "Vet ikke ennå")] + [
+        (package.name, package.name) for package in packages
+    ]
+
+    if form.validate_on_submit():
+        wait = take_attempt(
+            "inquiry:" + (request.remote_addr or "unknown"),
+            current_app.config["INQUIRY_IP_BURST"],
+            current_app.config["INQUIRY_IP_PER_MINUTE"],
+        )
+        if wait:
+            flash("For mange henvendelser. Prøv igjen senere.", "error")
+            response = make_response(
+                render_template(
+                    "catering.html",
+                    packages=packages,
+                    contact_info=contact_info,
+                    form=form,
+                    catering_version=current_version(CATERING),
+                ),
+                429,
+            )
+            response.headers["Retry-After"] = str(math.ceil(wait))
+            return response
+
+        inquiry = CateringInquiry()
+        inquiry.name = form.name.data
+        inquiry.email = form.email.data
+        inquiry.phone = form.phone.data
+        inquiry.event_date = form.event_date.data
+        inquiry.persons = form.persons.data
+        inquiry.package_name = form.package_name.data or None
+        inquiry.message = form.message.data
+        db.session.add(inquiry)
+        db.session.commit()
 
-    # Handle form submission if needed
-    form_submitted = False
-    if request.method == "POST":
-        # Basic form handling - you can expand this
+        # Mail goes out from a background thread; never wait on it here
+        queue_inquiry_notification(inquiry.id)
         flash("Takk for din henvendelse! Vi kontakter deg snart.", "success")
-        form_submitted = True
+        return redirect(url_for("public.catering"))
 
     return render_template(
         "catering.html",
         packages=packages,
         contact_info=contact_info,
-        form_submitted=form_submitted,
+        form=form,
+        # Part of the package card keys: unlinking a dish can make
+        # contents_updated_at go back to an older value
+        catering_version=current_version(CATERING),
     )
 
 
-@app.route("/kontakt")
+@public_bp.route("/kontakt")
+@conditional_page([RestaurantInfo])
 def contact():
     """Contact page with business information and mailto links"""
     return render_template("contact.html")
@@ -316,11 +724,11 @@ def contact():
 # Contact form functions removed since we now use mailto links
 
 
-@app.errorhandler(404)
+@public_bp.app_errorhandler(404)
 def not_found_error(error):
     return render_template("404.html"), 404
 
 
-@app.errorhandler(500)
+@public_bp.app_errorhandler(500)
 def internal_error(error):
     return render_template("500.html"), 500
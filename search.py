@@ -0,0 +1,193 @@
+"""In-memory search over the menu, with allergen exclusion.
+
+Each app keeps an inverted index from normalised, stemmed words (see
+``utils.text.search_tokens``) to menu item ids. When the menu version
+changes, only rows whose ``updated_at`` moved past the last sync are
+re-read and re-indexed; deleted items are found by comparing id lists.
+
+Query words match as prefixes of indexed words, and every word is also
+indexed by its endings of at least ``MIN_FRAGMENT`` letters, so "kyll" finds
+"Kylling" and "nudler" finds the compound "Eggnudler". All query words must
+match. Allergen exclusion is one AND against each item's ``allergen_mask``.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from content import MENU, current_version
+from models import MenuItem
+from utils.text import search_tokens, split_dish_number
+
+CATEGORY_ORDER = ("hovedretter", "ekstra", "dessert", "drikker", "alkohol")
+# Re-read rows changed slightly before the last sync too, in case of clock
+# skew between the workers that set updated_at
+SYNC_OVERLAP = timedelta(minutes=1)
+MIN_FRAGMENT = 4
+
+
+def index_terms(words):
+    """Words plus their endings, so parts of compound words can be found"""
+    terms = set()
+    for word in words:
+        terms.add(word)
+        terms.update(word[i:] for i in range(1, len(word) - MIN_FRAGMENT + 1))
+    return terms
+
+
+def sort_key(doc):
+    """Position on the printed menu: category, then sort order, then name"""
+    category = doc["category"]
+    return (
+        CATEGORY_ORDER.index(category) if category in CATEGORY_ORDER else 99,
+        doc["sort_order"] or 0,
+        doc["name"],
+        doc["id"],
+    )
+
+
+class MenuSearchIndex:
+    """Inverted index plus the menu order, both kept sorted as items change"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}
+        self._tokens = {}  # id -> indexed terms, to unindex on change
+        self._masks = {}  # id -> allergen bitmask
+        self._keys = {}  # id -> sort key
+        self._postings = {}
+        self._vocabulary = []  # sorted terms, for prefix lookups
+        self._ordered = []  # sorted (sort key, id)
+        self.version = None
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def upsert(self, doc):
+        """Index one item, given as a dict shaped like the ones sync() builds"""
+        with self._lock:
+            self.remove(doc["id"])
+            number, name = split_dish_number(doc["name"])
+            words = search_tokens(f"{name} {doc.get('description') or ''}")
+            if number is not None:
+                words.append(str(number))
+            tokens = index_terms(words)
+
+            item_id = doc["id"]
+            self._docs[item_id] = doc
+            self._tokens[item_id] = tokens
+            self._masks[item_id] = doc["allergen_mask"]
+            self._keys[item_id] = key = sort_key(doc)
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    ids = self._postings[token] = set()
+                    insort(self._vocabulary, token)
+                ids.add(item_id)
+            insort(self._ordered, (key, item_id))
+
+    def remove(self, item_id):
+        with self._lock:
+            if self._docs.pop(item_id, None) is None:
+                return
+            del self._masks[item_id]
+            key = self._keys.pop(item_id)
+            for token in self._tokens.pop(item_id):
+                ids = self._postings[token]
+                ids.discard(item_id)
+                if not ids:
+                    del self._postings[token]
+                    del self._vocabulary[bisect_left(self._vocabulary, token)]
+            del self._ordered[bisect_left(self._ordered, (key, item_id))]
+
+    def _matching(self, token):
+        """Ids of items with a term starting with token (do not modify)"""
+        found = []
+        vocabulary = self._vocabulary
+        for position in range(bisect_left(vocabulary, token), len(vocabulary)):
+            term = vocabulary[position]
+            if not term.startswith(token):
+                break
+            found.append(self._postings[term])
+        if len(found) == 1:
+            return found[0]
+        return set().union(*found)
+
+    def search(self, query, exclude=0, limit=50):
+        """Items matching every word of query and none of the allergen bits in
+        exclude, in menu order"""
+        docs, masks, keys = self._docs, self._masks, self._keys
+        with self._lock:
+            ids = None
+            matches = [self._matching(token) for token in set(search_tokens(query))]
+            for matching in sorted(matches, key=len):
+                ids = matching if ids is None else ids & matching
+                if not ids:
+                    return []
+
+            # Walking the menu until limit hits takes about
+            # limit * len(menu) / len(ids) steps; sorting takes len(ids)
+            # slower ones, so only sort when there are few matches
+            if ids is not None and len(ids) ** 2 <= limit * len(self._ordered) // 8:
+                found = sorted((keys[i], i) for i in ids if not masks[i] & exclude)
+                return [docs[i] for _key, i in found[:limit]]
+
+            results = []
+            for _key, i in self._ordered:
+                if (ids is None or i in ids) and not masks[i] & exclude:
+                    results.append(docs[i])
+                    if len(results) == limit:
+                        break
+            return results
+
+    def sync(self):
+        """Bring the index up to date with the database if the menu changed"""
+        version = current_version(MENU)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            query = select(MenuItem)
+            if self.synced_at is not None:
+                since = self.synced_at - SYNC_OVERLAP
+                query = query.where(MenuItem.updated_at >= since)
+            changed = db.session.execute(query).scalars().all()
+
+            for item in changed:
+                if item.is_active and item.category != "catering":
+                    self.upsert(
+                        {
+                            "id": item.id,
+                            "name": item.name,
+                            "description": item.clean_description or "",
+                            "category": item.category,
+                            "sort_order": item.sort_order,
+                            "price": item.price,
+                            "allergen_mask": item.allergen_mask,
+                        }
+                    )
+                else:
+                    self.remove(item.id)
+
+            if self.synced_at is not None:
+                live_ids = set(db.session.execute(select(MenuItem.id)).scalars())
+                for item_id in set(self._docs) - live_ids:
+                    self.remove(item_id)
+
+            seen = [item.updated_at for item in changed] + [self.synced_at]
+            self.synced_at = max(filter(None, seen), default=None)
+            self.version = version
+
+
+def menu_index():
+    """The current app's search index, created on first use"""
+    index = current_app.extensions.get("menu_index")
+    if index is None:
+        index = current_app.extensions.setdefault("menu_index", MenuSearchIndex())
+    return index
@@ -0,0 +1,76 @@
+"""Restaurant settings (phone, e-mail, address, opening hours).
+
+All ``restaurant_info`` rows are loaded with one query into a read-only
+mapping that falls back to the defaults below, and cached per process until
+the settings content version changes.
+"""
+
+import re
+
+from sqlalchemy import select
+
+from app import db
+from content import SETTINGS, VersionedSnapshot, bump_version
+from models import RestaurantInfo
+
+DEFAULTS = {
+    "phone": "+47 61 17 77 71",
+    "email": "post@nawaratthaimat.no",
+    "address": "Tordenskjolds gate 1\n2821 Gjøvik\nNorge",
+    "opening_hours": (
+        "Tir - Ons: 11:00 - 18:00\n"
+        "Tor - Fre: 11:00 - 20:00\n"
+        "Lørdag: 10:00 - 20:00\n"
+        "Søndag: 12:00 - 20:00\n"
+        "Mandag: Stengt"
+    ),
+}
+
+
+def _lines(value):
+    return [line.strip() for line in value.splitlines() if line.strip()]
+
+
+def build_settings():
+    """Load every setting in one query and add values derived for templates"""
+    values = dict(DEFAULTS)
+    values.update(
+        db.session.execute(select(RestaurantInfo.key, RestaurantInfo.value)).all()
+    )
+
+    # "Tir - Ons: 11:00 - 18:00" -> ("Tir - Ons", "11:00 - 18:00")
+    values["opening_hours_rows"] = [
+        tuple(part.strip() for part in line.split(":", 1)) if ":" in line else (line, "")
+        for line in _lines(values["opening_hours"])
+    ]
+    values["address_lines"] = _lines(values["address"])
+    values["phone_href"] = "tel:" + re.sub(r"[^\d+]", "", values["phone"])
+    return values
+
+
+settings_snapshot = VersionedSnapshot(SETTINGS, build_settings)
+
+
+def get_settings():
+    """Read-only mapping of all restaurant settings"""
+    return settings_snapshot.get()
+
+
+def save_settings(values):
+    """Upsert the given settings in one transaction"""
+    existing = {
+        info.key: info
+        for info in RestaurantInfo.query.filter(RestaurantInfo.key.in_(values))
+    }
+    for key, value in values.items():
+        info = existing.get(key)
+        if info:
+            info.value = value
+        else:
+            info = RestaurantInfo()
+            info.key = key
+            info.value = value
+            db.session.add(info)
+
+    bump_version(SETTINGS)
+    db.session.commit()
@@ -0,0 +1,171 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SESSION_SECRET", "test")
+
+ADMIN_PASSWORD = "secret-password"
+
+
+def make_app(path, **config):
+    """An app on a fresh, migrated SQLite database at path"""
+    import migrations
+    from app import create_app
+
+    settings = {
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "MAIL_TRANSPORT": "log",
+        "STATIC_EXPORT_DIR": None,
+        # Every test client shares 127.0.0.1
+        "LOGIN_IP_BURST": 1000,
+        "INQUIRY_IP_BURST": 1000,
+    }
+    settings.update(config)
+    app = create_app(settings)
+    with app.app_context():
+        migrations.upgrade()
+    return app
+
+
+def dispose(app):
+    from app import db
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path / "test.db")
+    yield app
+    dispose(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    from app import db
+    from models import User
+
+    with app.app_context():
+        user = User(username="admin", email="admin@example.com", is_admin=True)
+        user.set_password(ADMIN_PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def admin_client(app, admin):
+    client = app.test_client()
+    response = client.post(
+        "/admin/login", data={"username": "admin", "password": ADMIN_PASSWORD}
+    )
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def add_menu_item(app):
+    """Insert a menu item through the model setters; returns its id"""
+    from app import db
+    from content import MENU, bump_version
+    from models import MenuItem
+
+    def add(name, price="100", category="hovedretter", description="", **fields):
+        with app.app_context():
+            item = MenuItem(name=name, category=category, is_active=True, **fields)
+            item.set_price(price)
+            item.set_description(description)
+            db.session.add(item)
+            bump_version(MENU)
+            db.session.commit()
+            return item.id
+
+    return add
+
+
+@pytest.fixture
+def add_package(app):
+    """Insert a catering package, linking its items to dishes; returns its id"""
+    from app import db
+    from catering import set_package_items
+    from content import CATERING, bump_version
+    from models import CateringPackage
+
+    def add(name, price="385 kr/pers", items="", allergens="", **fields):
+        fields.setdefault("is_active", True)
+        with app.app_context():
+            package = CateringPackage(name=name, **fields)
+            package.set_price_per_person(price)
+            package.set_allergens(allergens)
+            set_package_items(package, items)
+            db.session.add(package)
+            bump_version(CATERING)
+            db.session.commit()
+            return package.id
+
+    return add
+
+
+def menu_form(**fields):
+    """POST data for the admin menu item form"""
+    data = {
+        "name": "01. Kylling",
+        "description": "",
+        "price": "195",
+        "category": "hovedretter",
+        "subcategory": "",
+        "image_filename": "",
+        "sort_order": "1",
+        "is_active": "y",
+    }
+    data.update(fields)
+    return data
+
+
+
+def query_plans(app, client, path, table):
+    """(statement, EXPLAIN QUERY PLAN) of each SELECT from table that a GET of
+    path runs"""
+    from sqlalchemy import event
+
+    from app import db
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and f"FROM {table}" in statement:
+            executed.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get(path).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    with engine.connect() as connection:
+        return [
+            (
+                statement,
+                "\n".join(
+                    row.detail
+                    for row in connection.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )
+                ),
+            )
+            for statement, parameters in executed
+        ]
@@ -0,0 +1,73 @@
+from conftest import menu_form
+
+from allergens import format_mask, mask_of, numbers_in, parse_mask
+from app import db
+from models import Allergen, MenuItem
+from utils.text import clean_description_and_extract_allergens
+
+
+def test_allergens_are_split_off_the_description():
+    assert clean_description_and_extract_allergens(
+        "Kylling med cashewnøtter. Allergener: 1,5,8"
+    ) == ("Kylling med cashewnøtter", "1,5,8")
+    assert clean_description_and_extract_allergens("Uten allergener") == (
+        "Uten allergener",
+        "",
+    )
+    assert clean_description_and_extract_allergens(None) == ("", "")
+
+
+def test_set_description_stores_the_parsed_parts(app):
+    with app.app_context():
+        item = MenuItem(name="01. Kylling", category="hovedretter")
+        item.set_description("Paprika og løk. Allergener: 1, 5")
+        assert item.clean_description == "Paprika og løk"
+        assert item.allergens == "1, 5"
+        assert item.allergen_mask == mask_of([1, 5])
+
+
+def test_menu_shows_the_stored_allergens(client, add_menu_item):
+    add_menu_item("01. Kylling", description="Paprika. Allergener: 1,5")
+    page = client.get("/meny").get_data(as_text=True)
+    assert "Allergener:</strong> 1,5" in page
+    assert "Paprika. Allergener" not in page
+
+
+def test_mask_helpers_round_trip():
+    mask = parse_mask("1, 7,14")
+    assert numbers_in(mask) == [1, 7, 14]
+    assert format_mask(mask) == "1,7,14"
+    assert parse_mask("") == 0
+    assert parse_mask("99") == 0
+
+
+def test_menu_edit_updates_the_mask(app, admin_client, add_menu_item):
+    item_id = add_menu_item("01. Kylling", description="Allergener: 1")
+    admin_client.post(
+        f"/admin/menu/edit/{item_id}",
+        data=menu_form(description="Paprika. Allergener: 2,3"),
+    )
+    with app.app_context():
+        assert db.session.get(MenuItem, item_id).allergen_mask == mask_of([2, 3])
+
+
+def test_upgrade_seeds_codes_and_backfills_masks(app):
+    import migrations
+    from models import CateringPackage
+
+    with app.app_context():
+        assert db.session.get(Allergen, 14) is not None
+        item = MenuItem(
+            name="Gammel rett", price="100", category="hovedretter", allergens="1,3"
+        )
+        package = CateringPackage(name="Pakke", price_per_person="200", allergens="7")
+        db.session.add_all([item, package])
+        db.session.commit()
+        updated_at = item.updated_at
+
+        assert migrations.backfill_allergen_masks() == 2
+        assert migrations.backfill_allergen_masks() == 0
+        db.session.expire_all()
+        assert item.allergen_mask == mask_of([1, 3])
+        assert package.allergen_mask == mask_of([7])
+        assert item.updated_at == updated_at
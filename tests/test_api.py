@@ -0,0 +1,78 @@
+from conftest import query_plans
+
+
+def test_menu_api_groups_items(client, add_menu_item):
+    add_menu_item("01. Kylling", description="Med ris. Allergener: 1,8", price="195")
+    add_menu_item("Mango sticky rice", category="dessert", price="89")
+
+    data = client.get("/api/menu").get_json()
+
+    assert [item["name"] for item in data["categories"]["dessert"]] == [
+        "Mango sticky rice"
+    ]
+    [chicken] = data["categories"]["hovedretter"]
+    assert chicken["name"] == "01. Kylling"
+    assert chicken["price_ore"] == 19500
+    assert chicken["allergens"] == [1, 8]
+    assert chicken["description"] == "Med ris"
+
+
+def test_menu_api_category_filter(client, add_menu_item):
+    add_menu_item("01. Kylling")
+    add_menu_item("Mango sticky rice", category="dessert")
+
+    data = client.get("/api/menu?category=dessert").get_json()
+
+    assert list(data["categories"]) == ["dessert"]
+    assert client.get("/api/menu?category=pizza").status_code == 404
+
+
+def test_menu_api_etag_follows_the_menu_version(client, add_menu_item):
+    add_menu_item("01. Kylling")
+    first = client.get("/api/menu")
+
+    repeat = client.get("/api/menu", headers={"If-None-Match": first.headers["ETag"]})
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+
+    add_menu_item("02. Rød karri")
+    changed = client.get("/api/menu", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_catering_api_lists_items(client, add_menu_item, add_package):
+    add_menu_item("Vårruller", description="Allergener: 1")
+    add_package("Pakke 1", items="Vårruller\nRis", allergens="7", min_persons=10)
+    add_package("Gammel pakke", is_active=False)
+
+    [package] = client.get("/api/catering").get_json()["packages"]
+
+    assert package["name"] == "Pakke 1"
+    assert package["items"] == ["Vårruller", "Ris"]
+    assert package["price_per_person_ore"] == 38500
+    assert package["allergens"] == [1, 7]
+
+
+def test_catering_safe_checks_linked_dishes(client, add_menu_item, add_package):
+    add_menu_item("Vårruller", description="Allergener: 1")
+    add_package("Med vårruller", items="Vårruller", sort_order=1)
+    add_package("Med melk", allergens="7", sort_order=2)
+    add_package("Uten", sort_order=3)
+
+    def safe(exclude):
+        response = client.get(f"/api/catering/safe?exclude={exclude}")
+        return [package["name"] for package in response.get_json()["packages"]]
+
+    assert safe("") == ["Med vårruller", "Med melk", "Uten"]
+    assert safe("1") == ["Med melk", "Uten"]
+    assert safe("1,7") == ["Uten"]
+
+
+def test_catering_safe_reads_the_active_packages_index(app, client, add_package):
+    add_package("Pakke 1")
+
+    plans = query_plans(app, client, "/api/catering/safe", "catering_packages")
+
+    [plan] = [plan for sql, plan in plans if "ORDER BY catering_packages" in sql]
+    assert "USING INDEX ix_catering_packages_active_order" in plan
@@ -0,0 +1,54 @@
+from conftest import dispose, make_app
+from sqlalchemy import inspect
+
+
+def test_create_app_does_not_touch_the_database(tmp_path):
+    from app import create_app
+
+    path = tmp_path / "untouched.db"
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+
+    assert not path.exists()
+
+
+def test_db_upgrade_command(tmp_path):
+    from app import create_app, db
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'cli.db'}"})
+    runner = app.test_cli_runner()
+
+    for _ in range(2):
+        result = runner.invoke(args=["db", "upgrade"])
+        assert result.exit_code == 0, result.output
+        assert "up to date" in result.output
+
+    with app.app_context():
+        tables = inspect(db.engine).get_table_names()
+    assert {"users", "menu_items", "catering_packages"} <= set(tables)
+    dispose(app)
+
+
+def test_apps_do_not_share_caches(tmp_path):
+    from app import db
+    from content import MENU, bump_version
+    from models import MenuItem
+
+    apps = [make_app(tmp_path / f"{name}.db") for name in ("first", "second")]
+    for app, name in zip(apps, ("Pad Thai", "Tom Yum")):
+        with app.app_context():
+            item = MenuItem(name=name, category="hovedretter", is_active=True)
+            item.set_price("100")
+            db.session.add(item)
+            bump_version(MENU)
+            db.session.commit()
+
+    for app, name in zip(apps, ("Pad Thai", "Tom Yum")):
+        results = app.test_client().get("/api/menu/search?q=").get_json()["results"]
+        assert [result["name"] for result in results] == [name]
+
+    first, second = (app.extensions for app in apps)
+    for key in ("menu_index", "fragment_cache", "asset_manifest"):
+        assert first[key] is not second[key]
+    for app in apps:
+        assert app.jinja_env.fragment_cache is app.extensions["fragment_cache"]
+        dispose(app)
@@ -0,0 +1,52 @@
+import gzip
+
+from routes import template_version
+
+
+def test_static_urls_are_hashed_and_immutable(app, client):
+    with app.test_request_context():
+        from flask import url_for
+
+        url = url_for("static", filename="css/custom.css")
+    assert url != "/static/css/custom.css" and url.endswith(".css")
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+
+    plain = client.get("/static/css/custom.css")
+    assert plain.status_code == 200
+    assert not plain.cache_control.immutable
+
+
+def test_page_validator_covers_the_asset_manifests(app):
+    with app.app_context():
+        before = template_version()
+        assert template_version() == before
+
+    manifest = app.extensions["asset_manifest"]
+    manifest.hashed("css/custom.css")
+    manifest._hashed = dict(manifest._hashed, **{"css/custom.css": "css/custom.x.css"})
+    app.extensions.pop("template_version")
+    with app.app_context():
+        assert template_version() != before
+
+
+def test_precompressed_variant_is_served_when_accepted(client):
+    response = client.get("/static/css/custom.css", headers={"Accept-Encoding": "gzip"})
+    if response.headers.get("Content-Encoding") != "gzip":
+        # No .gz built for this checkout
+        assert "Accept-Encoding" not in response.headers.get("Vary", "")
+        return
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.mimetype == "text/css"
+    plain = client.get("/static/css/custom.css").get_data()
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_unknown_static_paths_are_not_remembered(app, client):
+    manifest = app.extensions["asset_manifest"]
+    for i in range(20):
+        assert client.get(f"/static/missing-{i}.css").status_code == 404
+    assert not any(name.startswith("missing-") for name in manifest._encodings)
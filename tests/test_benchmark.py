@@ -0,0 +1,44 @@
+import importlib.util
+import os
+import random
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def bench():
+    spec = importlib.util.spec_from_file_location(
+        "bench_run", os.path.join(ROOT, "benchmarks", "run.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_seed_builds_the_real_data_model(app, client, bench):
+    menu_items, packages = bench.seed(app, 20, 8, random.Random(1))
+    assert packages == 8 and menu_items > 20
+
+    quote = client.get("/api/catering/quote?persons=20").get_json()
+    assert all(package["total_ore"] for package in quote["packages"])
+    catering = client.get("/api/catering").get_json()
+    assert all(package["items"] for package in catering["packages"])
+
+
+def test_routes_run_sequentially_and_concurrently(app, bench):
+    from app import db
+
+    bench.seed(app, 10, 6, random.Random(1))
+    with app.app_context():
+        counter = bench.QueryCounter(db.engine)
+
+    result = bench.run_sequential(app, counter, "/catering", 3)
+    assert result["status"] == 200 and result["requests"] == 3
+    assert result["queries_per_request"] >= 0
+
+    # Eight load threads share one admin login instead of tripping the throttle
+    assert bench.make_client(app, admin=True).get("/admin/menu").status_code == 200
+    result = bench.run_concurrent(app, "/admin/menu", threads=8, total=16)
+    assert result["requests"] == 16
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from catalog import CatalogImportError, import_rows, read_rows, summarize
+from utils.images import find_missing_images
+
+MENU_CSV = os.path.join(os.path.dirname(__file__), "..", "attached_assets", "menu.csv")
+
+
+def _menu_rows():
+    with open(MENU_CSV, encoding="utf-8") as f:
+        return read_rows(f.read(), "csv")
+
+
+def test_menu_csv_images_exist(app):
+    images = [row["image_filename"] for row in _menu_rows()]
+
+    missing = find_missing_images(app.static_folder, os.devnull, images)
+
+    assert [path for path, _source in missing] == []
+
+
+def test_import_creates_then_updates(app):
+    rows = _menu_rows()
+
+    with app.app_context():
+        created = summarize(import_rows("menu", rows))
+        assert created["create"] == len(rows)
+        assert summarize(import_rows("menu", rows))["unchanged"] == len(rows)
+
+        rows[0]["price"] = "199"
+        plan = import_rows("menu", rows, dry_run=True)
+        assert plan[0]["action"] == "update"
+        assert set(plan[0]["changes"]) == {"price"}
+
+
+def test_import_lists_every_bad_row(app):
+    rows = [{"name": "", "price": "abc"}, {"name": "Ris", "colour": "hvit"}]
+
+    with app.app_context(), pytest.raises(CatalogImportError) as raised:
+        import_rows("menu", rows)
+
+    assert len(raised.value.errors) >= 2
+
+
+def test_export_round_trips(admin_client, app):
+    rows = _menu_rows()
+    with app.app_context():
+        import_rows("menu", rows)
+
+    response = admin_client.get("/admin/export/menu.csv")
+
+    assert response.status_code == 200
+    exported = read_rows(response.get_data(as_text=True), "csv")
+    with app.app_context():
+        assert summarize(import_rows("menu", exported, dry_run=True)) == {
+            "create": 0,
+            "update": 0,
+            "unchanged": len(rows),
+        }
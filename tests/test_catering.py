@@ -0,0 +1,104 @@
+from conftest import query_plans
+from sqlalchemy import event
+
+from catering import dish_key
+
+
+def test_dish_key_ignores_number_case_and_accents():
+    assert dish_key("07. Rød Karri  m/ And") == "rod karri m/ and"
+    assert dish_key("Vårruller") == dish_key("VARRULLER")
+
+
+def test_lines_link_to_menu_items(app, add_menu_item, add_package):
+    from app import db
+    from models import CateringPackage
+
+    item_id = add_menu_item("14. Vårruller")
+    package_id = add_package("Pakke 1", items="vårruller\n  \nJasminris")
+
+    with app.app_context():
+        package = db.session.get(CateringPackage, package_id)
+        assert [entry.name for entry in package.contents] == ["vårruller", "Jasminris"]
+        assert [entry.menu_item_id for entry in package.contents] == [item_id, None]
+        assert package.items == "vårruller\nJasminris"
+
+
+def test_active_packages_load_in_one_query(app, add_menu_item, add_package):
+    from app import db
+    from catering import active_packages
+
+    add_menu_item("Vårruller")
+    add_package("Pakke 1", items="Vårruller\nRis", sort_order=2)
+    add_package("Pakke 2", items="Ris", sort_order=1)
+    add_package("Gammel", items="Ris", is_active=False)
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+        packages = active_packages()
+        names = [
+            [entry.display_name for entry in package.contents] for package in packages
+        ]
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert [package.name for package in packages] == ["Pakke 2", "Pakke 1"]
+    assert names == [["Ris"], ["Vårruller", "Ris"]]
+    assert len(statements) == 1
+
+
+def test_catering_page_reads_the_active_packages_index(app, client, add_package):
+    add_package("Pakke 1", items="Ris")
+
+    plans = query_plans(app, client, "/catering", "catering_packages")
+
+    [plan] = [plan for sql, plan in plans if "ORDER BY catering_packages" in sql]
+    assert "USING INDEX ix_catering_packages_active_order" in plan
+
+
+def test_admin_edit_relinks_the_contents(
+    app, admin_client, add_menu_item, add_package
+):
+    from app import db
+    from models import CateringPackage
+
+    item_id = add_menu_item("Vårruller")
+    package_id = add_package("Pakke 1", items="Ris")
+
+    response = admin_client.post(
+        f"/admin/catering/edit/{package_id}",
+        data={
+            "name": "Pakke 1",
+            "price_per_person": "385",
+            "items": "Ris\nVårruller",
+            "min_persons": "10",
+            "sort_order": "0",
+            "is_active": "y",
+        },
+    )
+
+    assert response.status_code == 302
+    with app.app_context():
+        package = db.session.get(CateringPackage, package_id)
+        assert [entry.menu_item_id for entry in package.contents] == [None, item_id]
+
+
+def test_upgrade_turns_item_text_into_rows(app, add_menu_item):
+    import migrations
+    from app import db
+    from models import CateringPackage
+
+    item_id = add_menu_item("Vårruller")
+    with app.app_context():
+        package = CateringPackage(
+            name="Gammel pakke", price_per_person="300", items="Vårruller\nRis"
+        )
+        db.session.add(package)
+        db.session.commit()
+
+        assert migrations.backfill_package_contents() == 1
+        assert migrations.backfill_package_contents() == 0
+        assert [entry.menu_item_id for entry in package.contents] == [item_id, None]
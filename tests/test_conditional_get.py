@@ -0,0 +1,54 @@
+import pytest
+from conftest import menu_form
+
+PAGES = ["/", "/meny", "/catering", "/kontakt"]
+
+
+@pytest.mark.parametrize("url", PAGES)
+def test_revalidation_answers_304(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    again = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == response.headers["ETag"]
+    assert again.get_data() == b""
+
+
+def test_menu_edit_changes_the_etag(client, admin_client, add_menu_item):
+    add_menu_item("01. Kylling")
+    etag = client.get("/meny").headers["ETag"]
+
+    admin_client.post("/admin/menu/add", data=menu_form(name="02. Wok"))
+
+    response = client.get("/meny", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "Wok" in response.get_data(as_text=True)
+
+
+def test_requests_with_a_session_are_always_rendered(admin_client):
+    response = admin_client.get("/meny")
+    assert "ETag" not in response.headers
+    assert admin_client.get("/meny").status_code == 200
+
+
+@pytest.mark.parametrize("url", PAGES)
+def test_settings_change_invalidates_every_page(client, admin_client, url):
+    etag = client.get(url).headers["ETag"]
+
+    admin_client.post(
+        "/admin/restaurant-info",
+        data={
+            "phone": "+47 99 99 99 99",
+            "email": "post@nawaratthaimat.no",
+            "address": "Tordenskjolds gate 1\n2821 Gjøvik",
+            "opening_hours": "Mandag: Stengt",
+        },
+    )
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "+47 99 99 99 99" in response.get_data(as_text=True)
@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app import db
+from conftest import menu_form
+from content import (
+    MENU,
+    VersionedSnapshot,
+    bump_version,
+    current_version,
+    current_versions,
+)
+
+
+def test_bump_version_creates_and_increments(app):
+    with app.app_context():
+        assert current_version(MENU) == 0
+        bump_version(MENU)
+        db.session.commit()
+        assert current_version(MENU) == 1
+        bump_version(MENU)
+        bump_version(MENU)
+        db.session.commit()
+        assert current_version(MENU) == 3
+
+
+def test_first_bumps_from_several_sessions_do_not_collide(app):
+    def bump(_):
+        with app.app_context():
+            bump_version("race")
+            db.session.commit()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(bump, range(8)))
+    with app.app_context():
+        assert current_versions()["race"] == 8
+
+
+def test_snapshot_rebuilds_only_when_the_version_changes(app):
+    builds = []
+    snapshot = VersionedSnapshot(MENU, lambda: builds.append(1) or {"n": [len(builds)]})
+    with app.app_context():
+        first = snapshot.get()
+        assert snapshot.get() is first
+        assert first["n"] == (1,)  # frozen
+        bump_version(MENU)
+        db.session.commit()
+        assert snapshot.get()["n"] == (2,)
+    assert len(builds) == 2
+
+
+def test_snapshots_are_kept_per_app(app, tmp_path):
+    from app import create_app
+
+    other = create_app(
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'other.db'}"}
+    )
+    with other.app_context():
+        db.create_all()
+    snapshot = VersionedSnapshot(MENU, lambda: {"app": current_app_name()})
+
+    def current_app_name():
+        from flask import current_app
+
+        return current_app.config["SQLALCHEMY_DATABASE_URI"]
+
+    with app.app_context():
+        assert snapshot.get()["app"].endswith("test.db")
+    with other.app_context():
+        assert snapshot.get()["app"].endswith("other.db")
+
+
+def test_menu_page_follows_admin_edits(admin_client, client, add_menu_item):
+    item_id = add_menu_item("01. Kylling", description="Paprika")
+    assert "Kylling" in client.get("/meny").get_data(as_text=True)
+
+    admin_client.post(
+        f"/admin/menu/edit/{item_id}",
+        data=menu_form(name="01. Kylling Cashew", description="Paprika"),
+    )
+    assert "Kylling Cashew" in client.get("/meny").get_data(as_text=True)
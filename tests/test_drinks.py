@@ -0,0 +1,61 @@
+from conftest import menu_form
+
+from routes import group_subsections
+
+
+def test_group_subsections_keeps_order_and_unknown_items():
+    items = [
+        {"name": "Whisky", "subcategory": "brennevin"},
+        {"name": "Singha", "subcategory": "ol"},
+        {"name": "Sake", "subcategory": None},
+        {"name": "Chang", "subcategory": "ol"},
+    ]
+
+    sections = group_subsections(items)
+
+    assert [(s["key"], [i["name"] for i in s["items"]]) for s in sections] == [
+        ("ol", ["Singha", "Chang"]),
+        ("brennevin", ["Whisky"]),
+        (None, ["Sake"]),
+    ]
+    assert sections[-1]["title"] == "Annet"
+
+
+def test_menu_page_shows_new_drinks(client, add_menu_item):
+    add_menu_item("01. Kylling")
+    add_menu_item("Singha", category="alkohol", subcategory="ol")
+    add_menu_item("Hvitvin", category="alkohol", subcategory="vin")
+    add_menu_item("Sake", category="alkohol")
+
+    page = client.get("/meny").get_data(as_text=True)
+
+    assert page.index("Øl") < page.index("Singha") < page.index("Hvitvin (glass)")
+    assert page.index("Annet") < page.index("Sake")
+
+
+def test_admin_form_saves_the_subcategory(app, admin_client):
+    from models import MenuItem
+
+    response = admin_client.post(
+        "/admin/menu/add",
+        data=menu_form(name="Chang", category="alkohol", subcategory="ol"),
+    )
+
+    assert response.status_code == 302
+    with app.app_context():
+        assert MenuItem.query.filter_by(name="Chang").one().subcategory == "ol"
+
+
+def test_upgrade_fills_known_drinks(app, add_menu_item):
+    import migrations
+    from app import db
+    from models import MenuItem
+
+    add_menu_item("Rødvin", category="alkohol")
+    add_menu_item("Sake", category="alkohol")
+
+    with app.app_context():
+        assert migrations.fill_drink_subcategories() == 1
+        assert migrations.fill_drink_subcategories() == 0
+        subcategories = dict(db.session.query(MenuItem.name, MenuItem.subcategory))
+    assert subcategories == {"Rødvin": "vin", "Sake": None}
@@ -0,0 +1,34 @@
+import os
+
+from conftest import menu_form
+from content import MENU, SETTINGS
+from export import PAGES, export_pages, output_path, pages_for
+
+
+def test_export_writes_every_page(app, tmp_path):
+    with app.app_context():
+        written = export_pages(str(tmp_path))
+    assert sorted(written) == sorted(output_path(str(tmp_path), url) for url in PAGES)
+    with open(tmp_path / "meny" / "index.html", encoding="utf-8") as f:
+        assert "<html" in f.read()
+
+
+def test_only_affected_pages_are_refreshed():
+    assert pages_for({MENU}) == ["/meny"]
+    assert pages_for({SETTINGS}) == list(PAGES)
+
+
+def test_admin_save_refreshes_the_exported_menu(app, admin_client, tmp_path):
+    app.config["STATIC_EXPORT_DIR"] = str(tmp_path)
+    admin_client.post("/admin/menu/add", data=menu_form(name="07. Rød Karri"))
+
+    path = tmp_path / "meny" / "index.html"
+    assert path.exists()
+    assert "Rød Karri" in path.read_text(encoding="utf-8")
+    assert not os.path.exists(tmp_path / "kontakt" / "index.html")
+
+
+def test_cli_export(app, tmp_path):
+    result = app.test_cli_runner().invoke(args=["export", "--out", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "index.html").exists()
@@ -0,0 +1,80 @@
+from utils.fragment_cache import FragmentCache
+
+
+def _render(text):
+    calls = []
+
+    def render():
+        calls.append(text)
+        return text
+
+    return render, calls
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = FragmentCache(maxsize=2)
+    for key in ("a", "b", "a", "c"):
+        cache.fetch((key,), _render(key)[0])
+
+    assert cache.fetch(("a",), _render("stale")[0]) == "a"
+    render, calls = _render("b again")
+    assert cache.fetch(("b",), render) == "b again"
+    assert calls == ["b again"]
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "hits": 2,
+        "misses": 4,
+        "evictions": 2,
+    }
+
+
+def test_keys_with_none_and_size_zero_are_not_cached():
+    cache = FragmentCache(maxsize=10)
+    render, calls = _render("x")
+    cache.fetch(("card", None), render)
+    cache.fetch(("card", None), render)
+
+    disabled = FragmentCache(maxsize=0)
+    disabled.fetch(("card", 1), render)
+    disabled.fetch(("card", 1), render)
+
+    assert len(calls) == 4
+    assert cache.stats()["size"] == disabled.stats()["size"] == 0
+
+
+def test_menu_cards_are_reused_until_the_item_changes(app, client, add_menu_item):
+    from app import db
+    from content import MENU, bump_version
+    from models import MenuItem
+
+    item_id = add_menu_item("01. Kylling")
+    cache = app.extensions["fragment_cache"]
+
+    client.get("/meny")
+    client.get("/meny")
+    assert cache.stats()["hits"] == 1
+
+    with app.app_context():
+        db.session.get(MenuItem, item_id).name = "01. Kylling med ris"
+        bump_version(MENU)
+        db.session.commit()
+
+    assert "01. Kylling med ris" in client.get("/meny").get_data(as_text=True)
+
+
+def test_package_cards_follow_renamed_dishes(app, client, add_menu_item, add_package):
+    from app import db
+    from content import MENU, bump_version
+    from models import MenuItem
+
+    item_id = add_menu_item("Vårruller")
+    add_package("Pakke 1", items="Vårruller")
+    assert "Vårruller" in client.get("/catering").get_data(as_text=True)
+
+    with app.app_context():
+        db.session.get(MenuItem, item_id).name = "Vårruller med kylling"
+        bump_version(MENU)
+        db.session.commit()
+
+    assert "Vårruller med kylling" in client.get("/catering").get_data(as_text=True)
@@ -0,0 +1,75 @@
+from sqlalchemy import event
+
+
+def _count_user_queries(app):
+    from app import db
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    return statements
+
+
+def test_identity_is_cached_between_requests(app, admin_client):
+    admin_client.get("/admin/")
+    queries = _count_user_queries(app)
+
+    for _ in range(3):
+        assert admin_client.get("/admin/").status_code == 200
+
+    assert queries == []
+
+
+def test_identity_expires_after_ttl(app, admin_client):
+    app.config["IDENTITY_CACHE_TTL"] = 0
+    queries = _count_user_queries(app)
+
+    admin_client.get("/admin/")
+    admin_client.get("/admin/")
+
+    assert len(queries) == 2
+
+
+def test_committed_user_changes_are_seen_at_once(app, admin, admin_client):
+    from app import db
+    from identity import load_identity
+    from models import User
+
+    with app.app_context():
+        assert load_identity(admin).is_admin
+        db.session.get(User, admin).is_admin = False
+        db.session.commit()
+        assert not load_identity(admin).is_admin
+
+    assert admin_client.get("/admin/").status_code != 200
+
+
+def test_deleted_user_is_logged_out(app, admin, admin_client):
+    from app import db
+    from models import User
+
+    with app.app_context():
+        db.session.delete(db.session.get(User, admin))
+        db.session.commit()
+
+    response = admin_client.get("/admin/")
+    assert response.status_code == 302
+    assert "/admin/login" in response.headers["Location"]
+
+
+def test_rolled_back_changes_keep_the_cache(app, admin):
+    from app import db
+    from identity import load_identity
+    from models import User
+
+    with app.app_context():
+        cached = load_identity(admin)
+        db.session.get(User, admin).username = "renamed"
+        db.session.flush()
+        db.session.rollback()
+        assert load_identity(admin) is cached
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from utils.images import DERIVED_DIR, build_derivatives, image_url, responsive_image
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def static_folder(tmp_path):
+    os.makedirs(tmp_path / "images")
+    Image.new("RGB", (800, 400), "red").save(tmp_path / "images" / "dish.jpg")
+    return tmp_path
+
+
+def test_build_derivatives_never_upscales(static_folder):
+    manifest = build_derivatives(str(static_folder))
+
+    entry = manifest["images/dish.jpg"]
+    assert (entry["width"], entry["height"]) == (800, 400)
+    assert [width for width, _ in entry["variants"]["jpg"]] == [320, 640, 800]
+    for width, filename in entry["variants"]["webp"]:
+        with Image.open(static_folder / filename) as derived:
+            assert derived.width == width
+
+
+def test_rebuild_prunes_derivatives_of_changed_sources(static_folder):
+    build_derivatives(str(static_folder))
+    before = set(os.listdir(static_folder / DERIVED_DIR))
+    Image.new("RGB", (800, 400), "blue").save(static_folder / "images" / "dish.jpg")
+    build_derivatives(str(static_folder))
+    after = set(os.listdir(static_folder / DERIVED_DIR))
+    assert before and not (before - {"manifest.json"}) & after
+
+
+def test_responsive_image_renders_a_picture(app, static_folder):
+    build_derivatives(str(static_folder))
+    app.static_folder = str(static_folder)
+    with app.test_request_context():
+        html = str(responsive_image("dish.jpg", alt="Rett", sizes="50vw", class_="a"))
+        assert html.startswith("<picture")
+        assert 'type="image/webp"' in html
+        assert "-320w." in html and "800w" in html
+        assert 'class="a"' in html and 'alt="Rett"' in html
+        assert "-640w." in image_url("dish.jpg", max_width=700)
+
+
+def test_responsive_image_falls_back_to_the_original(app, tmp_path):
+    app.static_folder = str(tmp_path)
+    with app.test_request_context():
+        html = str(responsive_image("images/missing.jpg", alt="x"))
+    assert html.startswith("<img") and "images/missing.jpg" in html
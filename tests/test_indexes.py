@@ -0,0 +1,41 @@
+from conftest import query_plans
+from sqlalchemy import inspect
+
+
+def test_menu_page_reads_the_active_items_index(app, client, add_menu_item):
+    for number in range(20):
+        add_menu_item(f"{number:02}. Rett", sort_order=number)
+
+    plans = query_plans(app, client, "/meny", "menu_items")
+
+    [plan] = [plan for sql, plan in plans if "ORDER BY menu_items.category" in sql]
+    assert "USING INDEX ix_menu_items_active_category_order" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_upgrade_creates_missing_indexes(app):
+    import migrations
+    from app import db
+
+    with app.app_context():
+        db.session.execute(db.text("DROP INDEX ix_menu_items_active_category_order"))
+        db.session.execute(db.text("DROP INDEX ix_catering_packages_active_order"))
+        db.session.commit()
+
+        added = migrations.add_missing_indexes()
+        assert migrations.add_missing_indexes() == []
+
+        indexes = {
+            index["name"]: index
+            for table in ("menu_items", "catering_packages")
+            for index in inspect(db.engine).get_indexes(table)
+        }
+    assert added == [
+        "ix_menu_items_active_category_order",
+        "ix_catering_packages_active_order",
+    ]
+    assert indexes["ix_menu_items_active_category_order"]["column_names"] == [
+        "category",
+        "sort_order",
+        "name",
+    ]
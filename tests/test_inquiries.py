@@ -0,0 +1,104 @@
+import pytest
+
+import mailer
+import routes
+from app import db
+from models import CateringInquiry
+
+INQUIRY = {"name": "Ola Nordmann", "email": "ola@example.com", "persons": "20"}
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    ids = []
+    monkeypatch.setattr(routes, "queue_inquiry_notification", ids.append)
+    return ids
+
+
+@pytest.fixture
+def sent(app, monkeypatch):
+    app.config.update(MAIL_RETRY_DELAY=0, MAIL_MAX_ATTEMPTS=3)
+    messages = []
+    monkeypatch.setitem(mailer.TRANSPORTS, "log", messages.append)
+    return messages
+
+
+def add_inquiry(app, **fields):
+    with app.app_context():
+        inquiry = CateringInquiry(**dict({"name": "Ola", "email": "o@x.no"}, **fields))
+        db.session.add(inquiry)
+        db.session.commit()
+        return inquiry.id
+
+
+def test_inquiry_is_stored_and_queued(app, client, queued):
+    response = client.post("/catering", data=INQUIRY)
+    assert response.status_code == 302
+    with app.app_context():
+        inquiry = db.session.get(CateringInquiry, queued[0])
+        assert (inquiry.name, inquiry.persons, inquiry.status) == (
+            "Ola Nordmann",
+            20,
+            "pending",
+        )
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"name": "Ola\nBcc: x@example.com"},
+        {"email": "ola@example.com\r\nBcc: x@example.com"},
+        {"package_name": "x" * 150},
+    ],
+)
+def test_invalid_inquiries_are_rejected(client, queued, fields):
+    response = client.post("/catering", data=dict(INQUIRY, **fields))
+    assert response.status_code == 200
+    assert queued == []
+
+
+def test_inquiries_are_rate_limited_per_ip(app, client, queued):
+    app.config.update(INQUIRY_IP_BURST=2, INQUIRY_IP_PER_MINUTE=1)
+    statuses = [client.post("/catering", data=INQUIRY).status_code for _ in range(3)]
+    assert statuses == [302, 302, 429]
+    assert len(queued) == 2
+
+
+def test_delivery_marks_the_inquiry_sent(app, sent):
+    inquiry_id = add_inquiry(app, package_name="Menyforslag 1")
+    mailer.deliver_inquiry(app, inquiry_id)
+    with app.app_context():
+        inquiry = db.session.get(CateringInquiry, inquiry_id)
+        assert (inquiry.status, inquiry.attempts) == ("sent", 1)
+    assert sent[0]["Reply-To"] == "o@x.no"
+    assert "Menyforslag 1" in sent[0].get_content()
+
+
+def test_delivery_retries_failed_sends(app, sent, monkeypatch):
+    calls = []
+
+    def flaky(message):
+        calls.append(message)
+        if len(calls) < 2:
+            raise RuntimeError("provider down")
+
+    monkeypatch.setitem(mailer.TRANSPORTS, "log", flaky)
+    inquiry_id = add_inquiry(app)
+    mailer.deliver_inquiry(app, inquiry_id)
+    with app.app_context():
+        inquiry = db.session.get(CateringInquiry, inquiry_id)
+        assert (inquiry.status, inquiry.attempts, inquiry.last_error) == (
+            "sent",
+            2,
+            None,
+        )
+
+
+def test_message_errors_count_as_failed_attempts(app, sent):
+    inquiry_id = add_inquiry(app, name="Ola\nBcc: x@example.com")
+    mailer.deliver_inquiry(app, inquiry_id)
+    with app.app_context():
+        inquiry = db.session.get(CateringInquiry, inquiry_id)
+        assert (inquiry.status, inquiry.attempts) == ("failed", 3)
+        assert "linefeed" in inquiry.last_error
+    assert sent == []
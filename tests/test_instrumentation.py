@@ -0,0 +1,51 @@
+import pytest
+from conftest import dispose, make_app
+
+from utils import instrumentation
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path / "test.db", SQL_INSTRUMENTATION=True, SLOW_REQUEST_MS=0)
+    yield app
+    dispose(app)
+
+
+def test_server_timing_is_off_by_default(tmp_path):
+    app = make_app(tmp_path / "plain.db")
+    try:
+        assert "Server-Timing" not in app.test_client().get("/meny").headers
+    finally:
+        dispose(app)
+
+
+def test_server_timing_header(client, add_menu_item):
+    add_menu_item("Pad Thai")
+
+    timing = client.get("/meny").headers["Server-Timing"]
+
+    for metric in ("db;dur=", "tpl;dur=", "app;dur=", "total;dur="):
+        assert metric in timing
+
+
+def test_slow_requests_are_logged_with_queries(app, client, add_menu_item):
+    add_menu_item("Pad Thai")
+
+    client.get("/meny?kategori=hovedretter")
+
+    with app.app_context():
+        entry = instrumentation.slow_requests()[0]
+    assert entry["method"] == "GET"
+    assert entry["path"] == "/meny?kategori=hovedretter"
+    assert entry["status"] == 200
+    assert entry["queries"]
+    assert entry["total_ms"] >= entry["db_ms"]
+
+
+def test_slow_requests_page(admin_client):
+    admin_client.get("/meny")
+
+    response = admin_client.get("/admin/slow-requests")
+
+    assert response.status_code == 200
+    assert b"/meny" in response.data
@@ -0,0 +1,87 @@
+import pytest
+from conftest import ADMIN_PASSWORD
+
+import login_guard
+from app import db
+from login_guard import MemoryBuckets, take_attempt
+from models import LoginBucket
+
+
+def _login(client, password="wrong"):
+    return client.post("/admin/login", data={"username": "admin", "password": password})
+
+
+def test_memory_buckets_refill_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(login_guard.time, "monotonic", lambda: now[0])
+    buckets = MemoryBuckets()
+
+    assert [buckets.take("k", 2, 6) for _ in range(2)] == [0.0, 0.0]
+    assert buckets.take("k", 2, 6) == pytest.approx(10.0)
+
+    now[0] += 10
+    assert buckets.take("k", 2, 6) == 0.0
+
+
+def test_login_is_throttled_per_username(app, client, admin):
+    app.config.update(LOGIN_USER_BURST=2, LOGIN_USER_PER_MINUTE=1)
+
+    statuses = [_login(client).status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    assert int(_login(client).headers["Retry-After"]) > 0
+
+
+def test_successful_login_refills_the_username(app, client, admin):
+    app.config.update(LOGIN_USER_BURST=2, LOGIN_USER_PER_MINUTE=1)
+    _login(client)
+
+    assert _login(client, ADMIN_PASSWORD).status_code == 302
+    other = app.test_client()
+    assert [_login(other).status_code for _ in range(2)] == [200, 200]
+
+
+def test_busy_hashing_pool_answers_503(app, client, admin):
+    app.config.update(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0)
+    with app.app_context():
+        _executor, slots = login_guard._get_executor()
+    slots.acquire()
+    try:
+        response = _login(client, ADMIN_PASSWORD)
+    finally:
+        slots.release()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert _login(client, ADMIN_PASSWORD).status_code == 302
+
+
+def test_database_buckets_are_shared(app):
+    app.config["LOGIN_THROTTLE_STORE"] = "db"
+
+    with app.app_context():
+        assert [take_attempt("ip:1.2.3.4", 2, 1) for _ in range(2)] == [0.0, 0.0]
+        assert take_attempt("ip:1.2.3.4", 2, 1) > 0
+        bucket = db.session.get(LoginBucket, "ip:1.2.3.4")
+        assert bucket.tokens < 1
+
+
+def test_database_bucket_created_by_another_worker(app, monkeypatch):
+    app.config["LOGIN_THROTTLE_STORE"] = "db"
+    real_get = db.session.get
+
+    def get_after_another_worker_inserted(model, key, **kwargs):
+        # The other worker's insert lands between our lookup and our insert
+        monkeypatch.setattr(db.session, "get", real_get)
+        with db.engine.begin() as connection:
+            connection.execute(
+                LoginBucket.__table__.insert().values(
+                    key=key, tokens=0.0, checked_at=login_guard.time.time()
+                )
+            )
+        return None
+
+    with app.app_context():
+        monkeypatch.setattr(db.session, "get", get_after_another_worker_inserted)
+        assert take_attempt("ip:1.2.3.4", 5, 1) > 0
+        assert db.session.query(LoginBucket).count() == 1
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import select
+
+from utils.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    keyset_paginate,
+)
+
+
+def _columns():
+    from models import MenuItem
+
+    return [MenuItem.category, MenuItem.sort_order, MenuItem.name, MenuItem.id]
+
+
+def _page(per_page=3, **cursors):
+    from app import db
+    from models import MenuItem
+
+    return keyset_paginate(
+        db.session, select(MenuItem), _columns(), per_page, **cursors
+    )
+
+
+def test_pages_walk_forward_and_back(app, add_menu_item):
+    names = [f"{number:02}. Rett" for number in range(1, 8)]
+    for number, name in enumerate(names, start=1):
+        add_menu_item(name, sort_order=number)
+
+    with app.app_context():
+        first = _page()
+        second = _page(after=first.next_cursor)
+        third = _page(after=second.next_cursor)
+        back = _page(before=second.prev_cursor)
+
+        assert [item.name for item in first] == names[0:3]
+        assert [item.name for item in second] == names[3:6]
+        assert [item.name for item in third] == names[6:]
+        assert [item.name for item in back] == names[0:3]
+        assert first.prev_cursor is None
+        assert third.next_cursor is None
+        assert back.prev_cursor is None and back.next_cursor is not None
+
+
+def test_cursor_round_trip(app):
+    values = ["hovedretter", 3, "Pad Thai", 12]
+
+    with app.app_context():
+        assert decode_cursor(encode_cursor(values), _columns()) == values
+        assert decode_cursor("", _columns()) is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        encode_cursor(["hovedretter", 3, "Pad Thai"]),
+        encode_cursor(["hovedretter", "3", "Pad Thai", 12]),
+        encode_cursor(["hovedretter", 3, "Pad Thai", True]),
+        encode_cursor({"category": "hovedretter"}),
+    ],
+)
+def test_bad_cursors_are_rejected(app, cursor):
+    with app.app_context(), pytest.raises(InvalidCursor):
+        decode_cursor(cursor, _columns())
+
+
+def test_bad_cursor_is_a_400(admin_client):
+    assert admin_client.get("/admin/menu?after=garbage").status_code == 400
+    assert admin_client.get("/admin/catering?before=WyJ4Il0").status_code == 400
@@ -0,0 +1,81 @@
+import pytest
+from conftest import query_plans
+
+from prices import format_price, parse_price
+
+
+@pytest.mark.parametrize(
+    "text, ore",
+    [
+        ("195", 19500),
+        ("385 kr/pers", 38500),
+        ("kr 1 299,50", 129950),
+        ("49,5", 4950),
+        ("", None),
+        ("Gratis", None),
+    ],
+)
+def test_parse_price(text, ore):
+    assert parse_price(text) == ore
+
+
+def test_format_price():
+    assert format_price(38500) == "385"
+    assert format_price(129950) == "1 299,50"
+    assert format_price(None) == ""
+
+
+def _quote(client, persons):
+    response = client.get(f"/api/catering/quote?persons={persons}")
+    return response.status_code, response.get_json()
+
+
+def test_quote_bills_at_least_min_persons(client, add_package):
+    add_package("Liten", price="300 kr/pers", min_persons=10, sort_order=1)
+    add_package("Stor", price="250 kr/pers", min_persons=30, sort_order=2)
+    add_package("Gammel", is_active=False)
+
+    status, data = _quote(client, 20)
+
+    assert status == 200
+    assert [
+        (package["name"], package["billed_persons"], package["total_ore"])
+        for package in data["packages"]
+    ] == [("Liten", 20, 600000), ("Stor", 30, 750000)]
+    assert data["packages"][0]["total"] == "6 000"
+
+
+@pytest.mark.parametrize("persons", ["0", "-3", "abc", "100000"])
+def test_quote_rejects_bad_headcounts(client, persons):
+    status, data = _quote(client, persons)
+
+    assert status == 400
+    assert "error" in data
+
+
+def test_quote_reads_the_active_packages_index(app, client, add_package):
+    add_package("Pakke 1")
+    path = "/api/catering/quote?persons=12"
+
+    plans = query_plans(app, client, path, "catering_packages")
+
+    [plan] = [plan for sql, plan in plans if "ORDER BY catering_packages" in sql]
+    assert "USING INDEX ix_catering_packages_active_order" in plan
+
+
+def test_upgrade_backfills_prices(app):
+    import migrations
+    from app import db
+    from models import CateringPackage, MenuItem
+
+    with app.app_context():
+        item = MenuItem(name="Gammel rett", price="195", category="hovedretter")
+        package = CateringPackage(name="Pakke", price_per_person="385 kr/pers")
+        db.session.add_all([item, package])
+        db.session.commit()
+
+        migrations.backfill_prices()
+        db.session.expire_all()
+
+        assert item.price_ore == 19500
+        assert package.price_per_person_ore == 38500
@@ -0,0 +1,117 @@
+import pytest
+from conftest import dispose, make_app, menu_form
+
+from utils import database
+
+
+def _add_dish(app, name, bumps=1):
+    from app import db
+    from content import MENU, bump_version
+    from models import MenuItem
+
+    with app.app_context():
+        item = MenuItem(name=name, category="hovedretter", is_active=True)
+        item.set_price("195")
+        db.session.add(item)
+        for _ in range(bumps):
+            bump_version(MENU)
+        db.session.commit()
+
+
+@pytest.fixture
+def app(tmp_path):
+    replica_path = tmp_path / "replica.db"
+    replica = make_app(replica_path)
+    _add_dish(replica, "01. Fra replika")
+    dispose(replica)
+
+    app = make_app(
+        tmp_path / "test.db", DATABASE_REPLICA_URL=f"sqlite:///{replica_path}"
+    )
+    # A different menu version than the replica, as after a lagging write
+    _add_dish(app, "01. Fra primær", bumps=2)
+    yield app
+    dispose(app)
+
+
+def _page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_public_pages_read_the_replica(client):
+    page = _page(client, "/meny")
+
+    assert "Fra replika" in page
+    assert "Fra primær" not in page
+
+
+def test_admin_pages_read_the_primary(admin_client):
+    page = _page(admin_client, "/admin/menu")
+
+    assert "Fra primær" in page
+    assert "Fra replika" not in page
+
+
+def _add_through_admin(client):
+    # Follow the redirect so the flash message doesn't show up on /meny
+    response = client.post(
+        "/admin/menu/add",
+        data=menu_form(name="02. Ny rett"),
+        follow_redirects=True,
+    )
+    assert response.status_code == 200
+
+
+def test_writers_read_their_own_writes(app, admin_client):
+    _add_through_admin(admin_client)
+
+    assert "Ny rett" in _page(admin_client, "/meny")
+    assert "Ny rett" not in _page(app.test_client(), "/meny")
+
+
+def test_read_your_writes_window_expires(app, admin_client):
+    app.config["DB_READ_YOUR_WRITES"] = 0
+    _add_through_admin(admin_client)
+
+    assert "Ny rett" not in _page(admin_client, "/meny")
+
+
+def test_export_reads_the_primary(app, tmp_path):
+    from export import export_pages
+
+    with app.app_context():
+        export_pages(str(tmp_path / "out"))
+
+    page = (tmp_path / "out" / "meny" / "index.html").read_text(encoding="utf-8")
+    assert "Fra primær" in page
+
+
+def test_pool_stats_cover_both_engines(app, client):
+    from app import db
+
+    _page(client, "/meny")
+
+    with app.app_context():
+        stats = database.pool_stats(db)
+    assert set(stats) == {"primary", "replica"}
+    assert stats["replica"]["checkouts"] > 0
+    assert stats["primary"]["timeouts"] == 0
+
+
+def test_pool_settings_come_from_config(tmp_path):
+    config = {
+        "DB_POOL_SIZE": 3,
+        "DB_MAX_OVERFLOW": 2,
+        "DB_POOL_TIMEOUT": 5.0,
+        "DB_POOL_RECYCLE": 60,
+        "DB_POOL_PRE_PING": False,
+    }
+
+    options = database.engine_options(config, f"sqlite:///{tmp_path / 'x.db'}")
+
+    assert options["poolclass"] is database.MeteredQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (3, 2)
+    assert options["pool_pre_ping"] is False
+    assert "poolclass" not in database.engine_options(config, "sqlite://")
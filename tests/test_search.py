@@ -0,0 +1,87 @@
+import pytest
+
+from search import MenuSearchIndex
+
+
+def _search(client, query, **params):
+    response = client.get("/api/menu/search", query_string={"q": query, **params})
+    assert response.status_code == 200
+    return [result["name"] for result in response.get_json()["results"]]
+
+
+@pytest.fixture
+def menu(add_menu_item):
+    add_menu_item(
+        "01. Kylling med cashewnøtter",
+        description="Paprika og løk. Allergener: 1,8",
+        sort_order=1,
+    )
+    add_menu_item(
+        "13. Stekte eggnudler",
+        description="Med grønnsaker. Allergener: 1,3",
+        sort_order=13,
+    )
+    add_menu_item("Kyllingsuppe", description="Med ris.", sort_order=8)
+    add_menu_item("Mango sticky rice", category="dessert", sort_order=1)
+
+
+def test_words_match_as_prefixes_in_menu_order(client, menu):
+    assert _search(client, "kyll") == ["01. Kylling med cashewnøtter", "Kyllingsuppe"]
+
+
+def test_every_word_must_match(client, menu):
+    assert _search(client, "kylling ris") == ["Kyllingsuppe"]
+
+
+def test_parts_of_compound_words_match(client, menu):
+    assert _search(client, "nudler") == ["13. Stekte eggnudler"]
+
+
+def test_dish_number_matches(client, menu):
+    assert _search(client, "13") == ["13. Stekte eggnudler"]
+
+
+def test_excluded_allergens_are_left_out(client, menu):
+    assert _search(client, "", exclude="1") == ["Kyllingsuppe", "Mango sticky rice"]
+    assert _search(client, "kylling", exclude="8") == ["Kyllingsuppe"]
+
+
+def test_index_follows_menu_changes(app, client, menu, add_menu_item):
+    from app import db
+    from content import MENU, bump_version
+    from models import MenuItem
+
+    assert _search(client, "suppe") == ["Kyllingsuppe"]
+
+    add_menu_item("Tom yum suppe", sort_order=9)
+    with app.app_context():
+        soup = MenuItem.query.filter_by(name="Kyllingsuppe").one()
+        soup.is_active = False
+        db.session.delete(MenuItem.query.filter_by(name="Mango sticky rice").one())
+        bump_version(MENU)
+        db.session.commit()
+
+    assert _search(client, "suppe") == ["Tom yum suppe"]
+    assert _search(client, "mango") == []
+
+
+def test_search_limit_and_sorting_paths_agree():
+    index = MenuSearchIndex()
+    for number in range(40):
+        index.upsert(
+            {
+                "id": number,
+                "name": f"Rett {number}",
+                "description": "ris" if number % 3 else "nudler",
+                "category": "hovedretter",
+                "sort_order": 40 - number,
+                "price": "100",
+                "allergen_mask": 0,
+            }
+        )
+
+    few = [doc["id"] for doc in index.search("nudler", limit=50)]
+    many = [doc["id"] for doc in index.search("ris", limit=5)]
+
+    assert few == sorted(few, reverse=True) and len(few) == 14
+    assert many == [38, 37, 35, 34, 32]
@@ -0,0 +1,212 @@
+"""Content-hashed URLs and precompressed variants for files under ``static/``.
+
+``url_for('static', filename='css/custom.css')`` becomes
+``/static/css/custom.<hash>.css``. Hashed URLs never change content, so they
+are served with a one-year immutable lifetime; plain paths stay short-lived.
+The manifest is written by ``flask assets build`` or, if missing, computed
+once per process on first use.
+
+``flask assets build`` also writes ``.br``/``.gz`` siblings for text assets.
+The static view serves the best one the client accepts and never compresses
+on the fly.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from flask import current_app, request
+
+from utils.images import DERIVED_DIR
+from utils.images import MANIFEST_NAME as IMAGE_MANIFEST_NAME
+
+MANIFEST_NAME = "assets-manifest.json"
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+SKIP_SUFFIXES = (".gz", ".br")
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".svg", ".json", ".txt", ".html")
+# Content-Encoding -> sibling file suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:10]
+
+
+def hashed_name(path, file_hash):
+    root, extension = os.path.splitext(path)
+    return f"{root}.{file_hash}{extension}"
+
+
+def build_asset_manifest(static_folder):
+    """Map every static file path to its content-hashed path"""
+    manifest = {}
+    for root, _dirs, files in os.walk(static_folder):
+        for filename in files:
+            if filename == MANIFEST_NAME or filename.endswith(SKIP_SUFFIXES):
+                continue
+            path = os.path.join(root, filename)
+            relative = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            if relative.startswith(DERIVED_DIR + "/") and filename != IMAGE_MANIFEST_NAME:
+                # Image derivatives already carry a content hash in their name
+                manifest[relative] = relative
+            else:
+                manifest[relative] = hashed_name(relative, _file_hash(path))
+    return manifest
+
+
+def write_asset_manifest(static_folder):
+    manifest = build_asset_manifest(static_folder)
+    with open(os.path.join(static_folder, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def compress_static(static_folder):
+    """Write .gz (and .br when brotli is installed) siblings for text assets.
+
+    Variants that would not be smaller than the original are skipped.
+    Returns the number of files written.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    compressors = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors[".br"] = lambda data: brotli.compress(data, quality=11)
+
+    written = 0
+    for root, _dirs, files in os.walk(static_folder):
+        for filename in files:
+            if not filename.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            path = os.path.join(root, filename)
+            with open(path, "rb") as f:
+                data = f.read()
+
+            for suffix, compress in compressors.items():
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(
+                    target
+                ) >= os.path.getmtime(path):
+                    continue
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+class AssetManifest:
+    """Lazily loaded path <-> hashed path lookup for one static folder"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self._lock = threading.Lock()
+        self._hashed = None
+        self._originals = None
+        self._encodings = {}
+
+    def _load(self):
+        with self._lock:
+            if self._hashed is not None:
+                return
+            try:
+                with open(os.path.join(self.static_folder, MANIFEST_NAME)) as f:
+                    hashed = json.load(f)
+            except FileNotFoundError:
+                hashed = build_asset_manifest(self.static_folder)
+            self._originals = {value: key for key, value in hashed.items()}
+            self._hashed = hashed
+
+    def hashed(self, filename):
+        if self._hashed is None:
+            self._load()
+        return self._hashed.get(filename, filename)
+
+    def digest(self):
+        """Short hash of the whole manifest; changes whenever an asset does"""
+        if self._hashed is None:
+            self._load()
+        data = json.dumps(self._hashed, sort_keys=True).encode()
+        return hashlib.sha1(data).hexdigest()[:12]
+
+    def original(self, filename):
+        """Return the real path for a hashed path, or None if not hashed"""
+        if self._originals is None:
+            self._load()
+        return self._originals.get(filename)
+
+    def encodings(self, filename):
+        """Precompressed variants on disk for a file, as (encoding, suffix) pairs"""
+        variants = self._encodings.get(filename)
+        if variants is not None:
+            return variants
+        if not filename.endswith(COMPRESSIBLE_SUFFIXES):
+            return ()
+        path = os.path.join(self.static_folder, filename)
+        variants = tuple(
+            (encoding, suffix)
+            for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        )
+        # Only remember real assets, so random request paths can't grow the dict
+        if self._hashed is None:
+            self._load()
+        if filename in self._hashed:
+            self._encodings[filename] = variants
+        return variants
+
+
+def _send_precompressed(manifest, filename):
+    """Send the best precompressed variant the client accepts, if any"""
+    variants = manifest.encodings(filename)
+    for encoding, suffix in variants:
+        if request.accept_encodings[encoding]:
+            response = current_app.send_static_file(filename + suffix)
+            response.mimetype = mimetypes.guess_type(filename)[0] or response.mimetype
+            response.content_encoding = encoding
+            break
+    else:
+        response = current_app.send_static_file(filename)
+
+    if variants:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_app(app):
+    """Rewrite static URLs to hashed names and serve them as immutable"""
+    manifest = AssetManifest(app.static_folder)
+    app.extensions["asset_manifest"] = manifest
+
+    @app.url_defaults
+    def hash_static_filename(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = manifest.hashed(values["filename"])
+
+    def static(filename):
+        original = manifest.original(filename)
+        response = _send_precompressed(manifest, original or filename)
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        if original is None:
+            response.cache_control.max_age = app.config["STATIC_MAX_AGE"]
+        else:
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = static
@@ -0,0 +1,147 @@
+"""Connection pool settings, read-replica routing and pool metrics.
+
+With ``DATABASE_REPLICA_URL`` set, requests that call ``prefer_replica()``
+(the public blueprint does, before each request) run their reads on the
+replica. Everything else uses the primary: writes, reads in a session that
+has already written, CLI commands, and every request from a browser that
+committed a change in the last ``DB_READ_YOUR_WRITES`` seconds, so an admin
+sees their own edit even while the replica lags behind, and internal
+renders such as the static export (marked with ``READ_PRIMARY``).
+
+Pools are ``MeteredQueuePool``s that count checkouts and time spent waiting
+for a free connection; ``pool_stats()`` reports them with the current use.
+"""
+
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA = "replica"
+PRIMARY_UNTIL = "_db_primary_until"
+# WSGI environ key for internal renders that must see the latest commit;
+# clients can't set environ keys, unlike headers
+READ_PRIMARY = "restaurant.read_primary"
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args, max_overflow=10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def engine_options(config, uri):
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings"""
+    options = {
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+    }
+    url = make_url(uri) if uri else None
+    if url is not None and url.get_backend_name() == "sqlite":
+        # In-memory SQLite needs its single shared connection
+        if url.database in (None, "", ":memory:"):
+            return options
+    options["poolclass"] = MeteredQueuePool
+    options["pool_timeout"] = config["DB_POOL_TIMEOUT"]
+    if config["DB_POOL_SIZE"] is not None:
+        options["pool_size"] = config["DB_POOL_SIZE"]
+    if config["DB_MAX_OVERFLOW"] is not None:
+        options["max_overflow"] = config["DB_MAX_OVERFLOW"]
+    return options
+
+
+def prefer_replica():
+    """Send this request's reads to the replica, unless the browser has
+    recently written through the primary or the request is an internal
+    render marked with READ_PRIMARY"""
+    if request.environ.get(READ_PRIMARY):
+        return
+    until = session.get(PRIMARY_UNTIL)
+    if until is not None:
+        if until > time.time():
+            return
+        # Expired: drop it so the page can be cached again
+        session.pop(PRIMARY_UNTIL)
+    g.db_replica = True
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends plain reads to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not self.info.get("wrote")
+            and not isinstance(clause, UpdateBase)
+            and has_request_context()
+            and g.get("db_replica")
+            and REPLICA in self._db.engines
+        ):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(db_session, flush_context):
+    db_session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _read_your_writes(db_session):
+    if not db_session.info.get("wrote") or not has_request_context():
+        return
+    if REPLICA in db_session._db.engines:
+        window = current_app.config["DB_READ_YOUR_WRITES"]
+        session[PRIMARY_UNTIL] = time.time() + window
+
+
+def pool_stats(db):
+    """Use and wait times of every engine's pool, by bind name"""
+    stats = {}
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        if not isinstance(pool, MeteredQueuePool):
+            continue
+        capacity = pool.size() + max(pool.max_overflow, 0)
+        with pool._metrics_lock:
+            checkouts, wait_total = pool.checkouts, pool.wait_total
+            stats[key or "primary"] = {
+                "size": pool.size(),
+                "max_overflow": pool.max_overflow,
+                "checked_out": pool.checkedout(),
+                "utilization": pool.checkedout() / capacity if capacity else 0.0,
+                "checkouts": checkouts,
+                "timeouts": pool.timeouts,
+                "wait_avg_ms": wait_total / checkouts * 1000 if checkouts else 0.0,
+                "wait_max_ms": pool.wait_max * 1000,
+            }
+    return stats
@@ -0,0 +1,98 @@
+"""``{% cache %}`` blocks for Jinja: reuse the markup of unchanged rows.
+
+    {% cache "menu-card", item.id, item.updated_at %}
+        ... markup that depends only on item ...
+    {% endcache %}
+
+The template name and the key parts together identify a fragment, so the
+key must cover everything the block shows; a row id plus its ``updated_at``
+does that for a block built from one row. If any key part is None or
+undefined (rows that are not from the database) the block is rendered every
+time.
+
+Fragments are kept per app in an LRU of at most ``FRAGMENT_CACHE_SIZE``
+entries (0 turns caching off). Keys of changed rows simply stop being asked
+for and fall out at the end of the LRU.
+"""
+
+import threading
+from collections import OrderedDict
+
+from jinja2 import Undefined, nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments with hit/miss counters"""
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def fetch(self, key, render):
+        """The fragment for key, rendering and storing it on a miss"""
+        if self.maxsize <= 0 or None in key:
+            return render()
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        # Render outside the lock; two threads may both render a new key
+        fragment = render()
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.maxsize:
+                self._fragments.popitem(last=False)
+                self.evictions += 1
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._fragments),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        # Replaced by init_app; outside an app blocks are always rendered
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        call = self.call_method("_cached", [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cached(self, key, caller):
+        key = tuple(None if isinstance(part, Undefined) else part for part in key)
+        return self.environment.fragment_cache.fetch(key, caller)
+
+
+def init_app(app):
+    """Enable ``{% cache %}`` in the app's templates"""
+    cache = FragmentCache(app.config["FRAGMENT_CACHE_SIZE"])
+    app.extensions["fragment_cache"] = cache
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = cache
@@ -0,0 +1,202 @@
+"""Resized image derivatives and ``srcset`` markup for images in ``static/``.
+
+``build_derivatives`` writes WebP and JPEG copies of every photo under
+``static/images`` at a few widths, named with a hash of the source file, plus
+a ``manifest.json`` describing them. ``responsive_image`` reads that manifest
+and falls back to the original file for images that have no derivatives yet.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from functools import cache
+
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+
+DERIVED_DIR = "images/derived"
+MANIFEST_NAME = "manifest.json"
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+WIDTHS = (320, 640, 960, 1280)
+FORMATS = {"webp": "WEBP", "jpg": "JPEG"}  # file extension -> Pillow format
+QUALITY = 78
+
+# Matches url_for('static', filename='images/...') in templates
+TEMPLATE_IMAGE_PATTERN = re.compile(r"filename=['\"](images/[^'\"]+)['\"]")
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:10]
+
+
+def _source_images(static_folder):
+    derived_dir = os.path.join(static_folder, DERIVED_DIR)
+    for root, dirs, files in os.walk(os.path.join(static_folder, "images")):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != derived_dir]
+        for filename in sorted(files):
+            if filename.lower().endswith(SOURCE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, static_folder).replace(os.sep, "/")
+
+
+def build_derivatives(static_folder, widths=WIDTHS):
+    """Create missing derivatives, prune stale ones and rewrite the manifest.
+
+    Returns the manifest as a dict.
+    """
+    from PIL import Image, ImageOps  # Only needed at build time
+
+    derived_dir = os.path.join(static_folder, DERIVED_DIR)
+    os.makedirs(derived_dir, exist_ok=True)
+    manifest = {}
+    keep = {MANIFEST_NAME}
+
+    for source in _source_images(static_folder):
+        source_path = os.path.join(static_folder, source)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        source_hash = _file_hash(source_path)
+
+        with Image.open(source_path) as original:
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            # Never upscale; images narrower than the smallest width get one copy
+            targets = [w for w in widths if w < image.width] + [
+                min(image.width, max(widths))
+            ]
+            entry = {"width": image.width, "height": image.height, "variants": {}}
+
+            for extension, pil_format in FORMATS.items():
+                variants = []
+                for width in sorted(set(targets)):
+                    filename = f"{stem}-{width}w.{source_hash}.{extension}"
+                    keep.add(filename)
+                    target_path = os.path.join(derived_dir, filename)
+                    if not os.path.exists(target_path):
+                        height = round(image.height * width / image.width)
+                        resized = image.resize((width, height), Image.LANCZOS)
+                        resized.save(
+                            target_path, pil_format, quality=QUALITY, optimize=True
+                        )
+                    variants.append([width, f"{DERIVED_DIR}/{filename}"])
+                entry["variants"][extension] = variants
+            manifest[source] = entry
+
+    for filename in os.listdir(derived_dir):
+        if filename not in keep:
+            os.remove(os.path.join(derived_dir, filename))
+
+    with open(os.path.join(derived_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    load_manifest.cache_clear()
+    return manifest
+
+
+@cache
+def load_manifest(static_folder):
+    """Read the derivative manifest once per process ({} if not built)"""
+    try:
+        with open(os.path.join(static_folder, DERIVED_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def find_missing_images(static_folder, template_folder, image_filenames=()):
+    """Return sorted (image path, referenced from) pairs for missing files"""
+    references = {}
+    for root, _dirs, files in os.walk(template_folder):
+        for filename in files:
+            path = os.path.join(root, filename)
+            with open(path, encoding="utf-8") as f:
+                for match in TEMPLATE_IMAGE_PATTERN.finditer(f.read()):
+                    references.setdefault(match.group(1), os.path.relpath(path))
+    for filename in image_filenames:
+        if filename:
+            references.setdefault(_image_path(filename), "menu_items.image_filename")
+
+    return sorted(
+        (path, source)
+        for path, source in references.items()
+        if not os.path.exists(os.path.join(static_folder, path))
+    )
+
+
+def _image_path(path):
+    # MenuItem.image_filename holds a bare file name under images/
+    return path if "/" in path else f"images/{path}"
+
+
+def _srcset(variants):
+    return ", ".join(
+        f"{url_for('static', filename=filename)} {width}w" for width, filename in variants
+    )
+
+
+_warned_missing = set()
+
+
+def responsive_image(path, alt="", sizes="100vw", **attrs):
+    """Render a <picture> with WebP/JPEG srcsets for a static image.
+
+    ``path`` is either a static path ("images/Catering1.jpg") or a bare
+    ``MenuItem.image_filename``. Extra keyword arguments become attributes on
+    the <img>; use ``class_`` for the class attribute.
+    """
+    path = _image_path(path)
+    static_folder = current_app.static_folder
+    entry = load_manifest(static_folder).get(path)
+
+    if entry is None and path not in _warned_missing:
+        if not os.path.exists(os.path.join(static_folder, path)):
+            logging.warning("Referenced image %s does not exist", path)
+        _warned_missing.add(path)
+
+    img_attrs = {"alt": alt}
+    for key, value in attrs.items():
+        img_attrs[key.rstrip("_").replace("_", "-")] = value
+
+    if entry is None:
+        img_attrs["src"] = url_for("static", filename=path)
+        return Markup("<img {}>").format(_attributes(img_attrs))
+
+    jpeg_variants = entry["variants"]["jpg"]
+    img_attrs.update(
+        src=url_for("static", filename=jpeg_variants[-1][1]),
+        srcset=_srcset(jpeg_variants),
+        sizes=sizes,
+    )
+    source = Markup('<source type="image/webp" srcset="{}" sizes="{}">').format(
+        _srcset(entry["variants"]["webp"]), sizes
+    )
+    # display: contents keeps <picture> out of the layout so existing img CSS applies
+    return Markup('<picture style="display: contents;">{}<img {}></picture>').format(
+        source, _attributes(img_attrs)
+    )
+
+
+def image_url(path, max_width=1280):
+    """URL of the largest JPEG derivative no wider than max_width"""
+    path = _image_path(path)
+    entry = load_manifest(current_app.static_folder).get(path)
+    if entry is None:
+        return url_for("static", filename=path)
+
+    candidates = [v for v in entry["variants"]["jpg"] if v[0] <= max_width]
+    _width, filename = (candidates or entry["variants"]["jpg"])[-1]
+    return url_for("static", filename=filename)
+
+
+def _attributes(attrs):
+    return Markup(" ").join(
+        Markup('{}="{}"').format(Markup(escape(key)), value)
+        for key, value in attrs.items()
+        if value is not None
+    )
@@ -0,0 +1,124 @@
+"""Opt-in per-request timing of SQL, template rendering and Python work.
+
+Enabled with ``SQL_INSTRUMENTATION=1``. Every response then carries a
+``Server-Timing`` header (visible in the browser's network panel), and
+requests slower than ``SLOW_REQUEST_MS`` are kept, with their queries, in a
+bounded in-memory log per app shown at ``/admin/slow-requests``.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request, template_rendered
+from flask.signals import before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_slow_requests_lock = threading.Lock()
+
+
+def slow_requests():
+    """Newest first list of the current app's recorded slow requests"""
+    log = current_app.extensions.get("instrumentation", ())
+    with _slow_requests_lock:
+        return list(reversed(log))
+
+
+def is_enabled(app):
+    return "instrumentation" in app.extensions
+
+
+def _timings():
+    if not has_request_context():
+        return None
+    return g.get("_timings")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _timings()
+    if timings is not None:
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _timings()
+    if timings is None or not conn.info.get("_query_start"):
+        return
+    elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+    timings["db"] += elapsed
+    timings["queries"].append((statement, elapsed))
+
+
+def _before_render(sender, template, context, **extra):
+    timings = _timings()
+    if timings is not None:
+        timings["render_stack"].append((time.perf_counter(), timings["db"]))
+
+
+def _after_render(sender, template, context, **extra):
+    timings = _timings()
+    if timings is None or not timings["render_stack"]:
+        return
+    started, db_before = timings["render_stack"].pop()
+    if not timings["render_stack"]:
+        # Queries run lazily while rendering count as database time
+        elapsed = time.perf_counter() - started
+        timings["template"] += elapsed - (timings["db"] - db_before)
+
+
+def init_app(app):
+    """Install the request hooks and event listeners"""
+    log = deque(maxlen=app.config["SLOW_REQUEST_LOG_SIZE"])
+    app.extensions["instrumentation"] = log
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_timing():
+        g._timings = {
+            "start": time.perf_counter(),
+            "db": 0.0,
+            "template": 0.0,
+            "queries": [],
+            "render_stack": [],
+        }
+
+    @app.after_request
+    def add_server_timing(response):
+        timings = g.pop("_timings", None)
+        if timings is None:
+            return response
+
+        total = time.perf_counter() - timings["start"]
+        python = max(total - timings["db"] - timings["template"], 0.0)
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings["db"] * 1000:.1f};desc="{len(timings["queries"])} queries"',
+                f'tpl;dur={timings["template"] * 1000:.1f}',
+                f"app;dur={python * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+        if total * 1000 >= app.config["SLOW_REQUEST_MS"]:
+            entry = {
+                "time": datetime.utcnow(),
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "status": response.status_code,
+                "total_ms": total * 1000,
+                "db_ms": timings["db"] * 1000,
+                "template_ms": timings["template"] * 1000,
+                "python_ms": python * 1000,
+                "queries": [
+                    (statement, elapsed * 1000) for statement, elapsed in timings["queries"]
+                ],
+            }
+            with _slow_requests_lock:
+                log.append(entry)
+        return response
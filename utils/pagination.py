@@ -0,0 +1,117 @@
+"""Keyset ("seek") pagination for SQLAlchemy selects.
+
+Instead of ``OFFSET n``, which makes the database walk past every skipped
+row, each page starts right after the sort key of the last row shown, so
+any page costs the same as the first one and can use the index on the sort
+columns. The sort columns must end with a unique column (the primary key)
+and must not contain NULLs.
+"""
+
+import base64
+import binascii
+import json
+
+from sqlalchemy import tuple_
+from werkzeug.exceptions import BadRequest
+
+
+def encode_cursor(values):
+    data = json.dumps(values, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+class InvalidCursor(BadRequest):
+    """A cursor that was not made by encode_cursor for these columns"""
+
+    description = "Invalid page cursor"
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _matches(value, python_type):
+    if isinstance(value, bool):
+        return python_type is bool
+    if python_type is float:
+        return isinstance(value, (int, float))
+    if python_type is None:
+        return isinstance(value, (str, int, float))
+    return isinstance(value, python_type)
+
+
+def decode_cursor(cursor, columns):
+    """Sort key from a cursor string, or None if it is missing.
+
+    Raises InvalidCursor (a 400) if the cursor is malformed or its values
+    don't fit the columns, so they never reach the WHERE clause.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise InvalidCursor() from None
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor()
+    for value, column in zip(values, columns):
+        if not _matches(value, _python_type(column)):
+            raise InvalidCursor()
+    return values
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours (None at the ends)"""
+
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(session, statement, columns, per_page, after=None, before=None):
+    """Run an ORM select one page at a time, ordered ascending by columns.
+
+    ``after``/``before`` are cursors from a previous page's ``next_cursor``/
+    ``prev_cursor``; a cursor that doesn't decode raises InvalidCursor.
+    """
+    key = tuple_(*columns)
+    after = decode_cursor(after, columns)
+    before = decode_cursor(before, columns) if after is None else None
+
+    if before is not None:
+        statement = statement.where(key < tuple_(*before)).order_by(
+            *[column.desc() for column in columns]
+        )
+    else:
+        if after is not None:
+            statement = statement.where(key > tuple_(*after))
+        statement = statement.order_by(*columns)
+
+    items = session.execute(statement.limit(per_page + 1)).scalars().all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if before is not None:
+        items.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after is not None
+
+    def cursor_for(item):
+        return encode_cursor([getattr(item, column.key) for column in columns])
+
+    return KeysetPage(
+        items,
+        next_cursor=cursor_for(items[-1]) if has_next and items else None,
+        prev_cursor=cursor_for(items[0]) if has_prev and items else None,
+    )
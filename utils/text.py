@@ -1,6 +1,11 @@
 """Text processing utilities for the restaurant website."""
 
 import re
+import unicodedata
+
+# Look for allergen patterns like "Allergener: 1,2,3"
+ALLERGEN_PATTERN = re.compile(r"Allergener:\s*([\d,\s]+)", re.IGNORECASE)
+TRAILING_PUNCTUATION = re.compile(r"\s*[.,;]\s*$")
 
 
 def clean_description_and_extract_allergens(description):
@@ -16,17 +21,58 @@ def clean_description_and_extract_allergens(description):
     if not description:
         return "", ""
     
-    # Look for allergen patterns like "Allergener: 1,2,3"
-    allergen_pattern = r"Allergener:\s*([\d,\s]+)"
-    allergen_match = re.search(allergen_pattern, description, re.IGNORECASE)
+    allergen_match = ALLERGEN_PATTERN.search(description)
     
     if allergen_match:
         allergen_info = allergen_match.group(1).strip()
         # Remove allergen info from description
-        cleaned_desc = re.sub(allergen_pattern, "", description, flags=re.IGNORECASE)
+        cleaned_desc = ALLERGEN_PATTERN.sub("", description)
         cleaned_desc = cleaned_desc.strip()
         # Clean up any trailing punctuation or whitespace
-        cleaned_desc = re.sub(r'\s*[.,;]\s*$', '', cleaned_desc)
+        cleaned_desc = TRAILING_PUNCTUATION.sub('', cleaned_desc)
         return cleaned_desc, allergen_info
     
-    return description, ""
\ No newline at end of file
+    return description, ""
+
+# Search normalisation: fold Norwegian letters so "rod karri" finds "Rød karri"
+NORWEGIAN_FOLDS = str.maketrans(
+    {"æ": "ae", "ø": "o", "å": "a", "ö": "o", "ä": "ae"}
+)
+DISH_NUMBER = re.compile(r"^\s*(\d+)\s*\.\s*")
+WORD = re.compile(r"[a-z0-9]+")
+# Inflection endings, longest first ("nudlene" -> "nudl", "reker" -> "rek")
+SUFFIXES = ("ene", "ane", "er", "ar", "en", "et", "a", "e")
+STOP_WORDS = {"og", "med", "m", "eller", "i", "pa", "til", "av", "uten", "en", "et"}
+
+
+def split_dish_number(name):
+    """Split "01. Kylling med ris" into (1, "Kylling med ris")"""
+    match = DISH_NUMBER.match(name or "")
+    if not match:
+        return None, name or ""
+    return int(match.group(1)), name[match.end():]
+
+
+def fold_text(text):
+    """Lowercase, fold æ/ø/å (and the old "aa" spelling) and strip accents"""
+    text = unicodedata.normalize("NFKC", text or "").lower().translate(NORWEGIAN_FOLDS)
+    text = text.replace("aa", "a")
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(word):
+    """Strip one common Norwegian inflection ending, keeping at least 3 letters"""
+    if word.isdigit():
+        return str(int(word))
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def search_tokens(text):
+    """Normalised, stemmed search terms in a piece of text"""
+    return [
+        stem(word) for word in WORD.findall(fold_text(text)) if word not in STOP_WORDS
+    ]